@@ -7,7 +7,8 @@ from kivy.uix.screenmanager import ScreenManager, SlideTransition
 from kivy.core.window import Window
 from kivy.core.audio import SoundLoader
 
-from td.tools.assets import ensure_assets, AssetDownloadError, RECOMMENDED_UI_FILES
+from td.tools.assets import build_bundle, ensure_assets, AssetDownloadError, RECOMMENDED_UI_FILES
+from td.tools.atlas import build_atlases
 from td.util.resources import resource_path
 
 class RootScreens(ScreenManager):
@@ -23,6 +24,11 @@ class RandomTDApp(App):
                 Logger.info("assets: downloaded %d files", len(fetched))
         except AssetDownloadError as exc:
             Logger.warning("assets: %s", exc)
+        for pack in (build_bundle, build_atlases):
+            try:
+                pack()
+            except (OSError, ValueError) as exc:
+                Logger.warning("assets: %s failed: %s", pack.__name__, exc)
 
         self.assets_ready = all(Path(resource_path(*parts)).exists() for parts in RECOMMENDED_UI_FILES)
         font_path = Path(resource_path("assets", "fonts", "MedievalSharp.ttf"))
@@ -0,0 +1,89 @@
+"""Per-tick damage and status-effect stage.
+
+Towers only queue their hits while targeting; :func:`apply_hits` then
+writes all of them at once (column-wise for the NumPy enemy store) and
+:func:`tick_status` counts down slow and hit-flash timers, for object
+enemies only of the ones that have a timer running.
+
+A queued hit already predicts the enemy's hp: enemies that are going to
+die stop being targetable immediately, so later towers in the same tick
+pick someone else exactly as if the damage had been applied.
+"""
+
+HIT_FLASH = 0.28
+
+
+class HitQueue:
+    def __init__(self):
+        self.hp = {}     # enemy -> hp after the hits queued so far
+        self.slows = {}  # enemy -> (factor, duration)
+
+    def damage(self, enemy, dmg):
+        """Queue ``dmg`` against ``enemy`` and return its predicted hp."""
+        hp = self.hp.get(enemy, enemy.hp) - dmg
+        self.hp[enemy] = hp
+        if hp <= 0:
+            enemy.alive = False
+        return hp
+
+    def slow(self, enemy, factor, duration):
+        """Queue a slow; overlapping slows keep the strongest factor and the
+        longest duration."""
+        queued = self.slows.get(enemy)
+        if queued is not None:
+            factor = min(factor, queued[0])
+            duration = max(duration, queued[1])
+        self.slows[enemy] = (factor, duration)
+
+    def clear(self):
+        self.hp.clear()
+        self.slows.clear()
+
+
+def apply_hits(world):
+    """Write every queued hit and slow, then empty the queue."""
+    hits = world.hits
+    if not hits.hp and not hits.slows:
+        return
+    store = world.enemy_store
+    if store is not None:
+        store.apply_damage([e._i for e in hits.hp], list(hits.hp.values()), HIT_FLASH)
+        if hits.slows:
+            factors, durations = zip(*hits.slows.values())
+            store.apply_slows([e._i for e in hits.slows], factors, durations)
+    else:
+        timed = world.timed_enemies
+        for e, hp in hits.hp.items():
+            e.hp = hp
+            e.hit_flash = HIT_FLASH
+            timed[e] = None
+        for e, (factor, duration) in hits.slows.items():
+            e.apply_slow(factor, duration)
+            timed[e] = None
+    hits.clear()
+
+
+def tick_status(world, dt):
+    """Count down hit flash and slow timers of the enemies still in play."""
+    store = world.enemy_store
+    if store is not None:
+        store.tick_status(dt)
+        return
+    timed = world.timed_enemies
+    if not timed:
+        return
+    done = []
+    for e in timed:
+        if not e.alive:  # died or left the map this tick
+            done.append(e)
+            continue
+        if e.hit_flash > 0.0:
+            e.hit_flash = max(0.0, e.hit_flash - dt)
+        if e.slow_timer > 0.0:
+            e.slow_timer -= dt
+            if e.slow_timer <= 0.0:
+                e.slow_factor = 1.0
+        if e.hit_flash <= 0.0 and e.slow_timer <= 0.0:
+            done.append(e)
+    for e in done:
+        del timed[e]
@@ -0,0 +1,214 @@
+"""Optional NumPy struct-of-arrays storage for enemies.
+
+``World(array_enemies=True)`` keeps every enemy attribute in a column array
+and advances all of them along the path in one vectorized step.  The objects in
+``world.enemies`` are then :class:`ArrayEnemy` views whose attributes read
+and write straight through to those columns, so rendering and targeting
+code keeps working unchanged.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from td.core.path import locate_on_path
+
+STATUS_OK = 0
+STATUS_DEAD = 1
+STATUS_END = 2
+
+_FLOAT_COLUMNS = ("x", "y", "dist", "hp", "max_hp", "speed", "slow_factor", "slow_timer", "hit_flash")
+_COLUMNS = _FLOAT_COLUMNS + ("alive",)
+
+
+class _Column:
+    """Descriptor mapping an attribute onto ``obj._store.<name>[obj._i]``."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return getattr(obj._store, self.name)[obj._i]
+
+    def __set__(self, obj, value):
+        getattr(obj._store, self.name)[obj._i] = value
+
+
+class _Detached:
+    """One-row stand-in store holding the last values of a removed enemy."""
+
+    def __init__(self, store, i):
+        for name in _COLUMNS:
+            setattr(self, name, [getattr(store, name)[i]])
+        self.path = store.path
+        self.lengths = store.lengths
+
+
+class ArrayEnemy:
+    """Thin view of one row of an :class:`EnemyStore`.
+
+    Reads like an :class:`~td.core.entities.Enemy` but has no behaviour of
+    its own: movement and status effects are applied column-wise by the store.
+    """
+
+    __slots__ = ("_store", "_i", "enemy_type", "uid")
+
+    x = _Column("x")
+    y = _Column("y")
+    dist = _Column("dist")
+    hp = _Column("hp")
+    max_hp = _Column("max_hp")
+    speed = _Column("speed")
+    slow_factor = _Column("slow_factor")
+    slow_timer = _Column("slow_timer")
+    hit_flash = _Column("hit_flash")
+    alive = _Column("alive")
+
+    def __init__(self, store, i, enemy_type="normal", uid=0):
+        self._store = store
+        self._i = i
+        self.enemy_type = enemy_type
+        self.uid = uid
+
+    @property
+    def waypoints(self):
+        return self._store.path
+
+    @property
+    def lengths(self):
+        return self._store.lengths
+
+
+class EnemyStore:
+    """Column arrays for every live enemy, in spawn order."""
+
+    def __init__(self, waypoints, lengths, capacity=256):
+        if np is None:
+            raise ImportError("numpy is required for the array-backed enemy store")
+        self.path = waypoints
+        self.lengths = lengths
+        self._wp = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+        self._lengths = np.asarray(lengths, dtype=np.float64)
+        self.count = 0
+        self.views = []
+        self._capacity = 0
+        self._resize(max(1, capacity))
+
+    def _resize(self, capacity):
+        for name in _FLOAT_COLUMNS:
+            self._grow_column(name, np.zeros(capacity, dtype=np.float64))
+        self._grow_column("alive", np.zeros(capacity, dtype=bool))
+        self._capacity = capacity
+
+    def _grow_column(self, name, fresh):
+        old = getattr(self, name, None)
+        if old is not None:
+            fresh[:self.count] = old[:self.count]
+        setattr(self, name, fresh)
+
+    def spawn(self, hp, speed, enemy_type="normal", dist=0.0, uid=0):
+        if self.count == self._capacity:
+            self._resize(self._capacity * 2)
+        i = self.count
+        self.dist[i] = dist
+        self.x[i], self.y[i], _ = locate_on_path(self.path, self.lengths, dist)
+        self.hp[i] = hp
+        self.max_hp[i] = hp
+        self.speed[i] = speed
+        self.slow_factor[i] = 1.0
+        self.slow_timer[i] = 0.0
+        self.hit_flash[i] = 0.0
+        self.alive[i] = True
+        view = ArrayEnemy(self, i, enemy_type, uid)
+        self.views.append(view)
+        self.count += 1
+        return view
+
+    def step(self, dt):
+        """Advance every enemy by ``dt``, mirroring :meth:`Enemy.update`.
+
+        Returns ``(index, status)`` pairs for the enemies that died or reached
+        the end of the path, in spawn order; the caller removes them.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        alive = self.alive[:n]
+        status = np.where(alive, STATUS_OK, STATUS_DEAD)
+        status[alive & (self.dist[:n] >= self._lengths[-1])] = STATUS_END
+
+        idx = np.flatnonzero(status == STATUS_OK)
+        if idx.size:
+            dist = self.dist[idx] + self.speed[idx] * self.slow_factor[idx] * dt
+            self.dist[idx] = dist
+            self.x[idx], self.y[idx] = self._positions(dist)
+
+        done = np.flatnonzero(status)
+        return list(zip(done.tolist(), status[done].tolist()))
+
+    def apply_damage(self, indices, hp, flash):
+        """Set the hp of the hit rows (already reduced by the caller)."""
+        idx = np.asarray(indices, dtype=np.intp)
+        hp = np.asarray(hp, dtype=np.float64)
+        self.hp[idx] = hp
+        self.hit_flash[idx] = flash
+        self.alive[idx] &= hp > 0.0
+
+    def apply_slows(self, indices, factors, durations):
+        """Merge slows like :meth:`Enemy.apply_slow`; indices must be unique."""
+        idx = np.asarray(indices, dtype=np.intp)
+        self.slow_factor[idx] = np.minimum(self.slow_factor[idx], factors)
+        self.slow_timer[idx] = np.maximum(self.slow_timer[idx], durations)
+
+    def tick_status(self, dt):
+        """Count down hit flash and slow timers of every row."""
+        n = self.count
+        if n == 0:
+            return
+        flash = self.hit_flash[:n]
+        np.maximum(flash - dt, 0.0, out=flash)
+        timer = self.slow_timer[:n]
+        slowed = timer > 0.0
+        timer[slowed] -= dt
+        self.slow_factor[:n][slowed & (timer <= 0.0)] = 1.0
+
+    def _positions(self, dist):
+        """Vectorized :func:`locate_on_path` via a binary search per enemy."""
+        lengths = self._lengths
+        if lengths.size < 2:
+            return np.full(dist.shape, self._wp[0, 0]), np.full(dist.shape, self._wp[0, 1])
+        seg = np.clip(np.searchsorted(lengths, dist, side="right") - 1, 0, lengths.size - 2)
+        start = lengths[seg]
+        span = lengths[seg + 1] - start
+        frac = np.divide(dist - start, span, out=np.ones_like(dist), where=span > 0.0)
+        np.minimum(frac, 1.0, out=frac)
+        a = self._wp[seg]
+        b = self._wp[seg + 1]
+        return a[:, 0] + (b[:, 0] - a[:, 0]) * frac, a[:, 1] + (b[:, 1] - a[:, 1]) * frac
+
+    def remove(self, indices):
+        """Drop the given rows, keeping the remaining enemies in order."""
+        if not indices:
+            return
+        n = self.count
+        keep = np.ones(n, dtype=bool)
+        keep[indices] = False
+        for i in indices:
+            view = self.views[i]
+            view._store = _Detached(self, i)
+            view._i = 0
+        order = np.flatnonzero(keep)
+        for name in _COLUMNS:
+            column = getattr(self, name)
+            column[:order.size] = column[order]
+        # Compact the views in place; world.enemies is this very list
+        views = self.views
+        for i, j in enumerate(order.tolist()):
+            view = views[j]
+            view._i = i
+            views[i] = view
+        del views[order.size:]
+        self.count = order.size
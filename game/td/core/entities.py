@@ -1,25 +1,30 @@
+from td.core.path import locate_on_path
+
+
 class Enemy:
-    def __init__(self, x, y, hp, speed, waypoints, enemy_type="normal"):
-        self.x = x
-        self.y = y
+    # waypoints/lengths are the World's shared path lists, never copies
+    __slots__ = ("uid", "hp", "max_hp", "speed", "waypoints", "lengths", "dist", "x", "y", "_seg",
+                 "alive", "enemy_type", "slow_factor", "slow_timer", "hit_flash")
+
+    def __init__(self, hp, speed, waypoints, lengths, enemy_type="normal", dist=0.0, uid=0):
+        self.respawn(hp, speed, waypoints, lengths, enemy_type, dist, uid)
+
+    def respawn(self, hp, speed, waypoints, lengths, enemy_type="normal", dist=0.0, uid=0):
+        """Reinitialise every field; pooled enemies are recycled through here."""
+        self.uid = uid  # unique per spawn, unlike id() of a recycled object
         self.hp = float(hp)
         self.max_hp = float(hp)
         self.speed = float(speed)
         self.waypoints = waypoints
-        self._wp_idx = 1  # 0 is spawn point, move to 1
+        self.lengths = lengths  # cumulative arc length per waypoint
+        self.dist = float(dist)  # distance travelled along the path
+        self.x, self.y, self._seg = locate_on_path(waypoints, lengths, self.dist)
         self.alive = True
         self.enemy_type = enemy_type
-        self.anim = 0.0
         self.slow_factor = 1.0
         self.slow_timer = 0.0
         self.hit_flash = 0.0
 
-    def take_damage(self, dmg):
-        self.hp -= dmg
-        self.hit_flash = 0.28
-        if self.hp <= 0:
-            self.alive = False
-
     def apply_slow(self, factor, duration):
         if factor < self.slow_factor:
             self.slow_factor = factor
@@ -29,35 +34,31 @@ class Enemy:
     def update(self, dt):
         if not self.alive:
             return "dead"
-        if self._wp_idx >= len(self.waypoints):
+        if self.dist >= self.lengths[-1]:
             return "end"
-        tx, ty = self.waypoints[self._wp_idx]
-        dx = tx - self.x
-        dy = ty - self.y
-        dist = (dx*dx + dy*dy) ** 0.5
-        if dist < 1e-3:
-            self._wp_idx += 1
-            return "ok"
-        dirx = dx / dist
-        diry = dy / dist
-        speed = self.speed * self.slow_factor
-        self.x += dirx * speed * dt
-        self.y += diry * speed * dt
-        if self.hit_flash > 0.0:
-            self.hit_flash = max(0.0, self.hit_flash - dt)
-        if self.slow_timer > 0.0:
-            self.slow_timer -= dt
-            if self.slow_timer <= 0.0:
-                self.slow_factor = 1.0
-        self.anim += dt
-        if ((tx - self.x)**2 + (ty - self.y)**2) < 4.0:
-            self._wp_idx += 1
+        dist = self.dist = self.dist + self.speed * self.slow_factor * dt
+        lengths = self.lengths
+        seg = self._seg
+        end = lengths[seg + 1] if seg + 1 < len(lengths) else 0.0
+        if dist < end:
+            # Still on the same segment: plain interpolation, no search
+            start = lengths[seg]
+            frac = (dist - start) / (end - start)
+            ax, ay = self.waypoints[seg]
+            bx, by = self.waypoints[seg + 1]
+            self.x = ax + (bx - ax) * frac
+            self.y = ay + (by - ay) * frac
+        else:
+            self.x, self.y, self._seg = locate_on_path(self.waypoints, lengths, dist, seg)
         return "ok"
 
 
 class Tower:
+    __slots__ = ("x", "y", "grid", "tower_type", "level", "rng", "dmg", "firerate", "_cooldown", "anim",
+                 "splash", "coverage", "pieces", "targeting")
+
     def __init__(self, x, y, grid, tower_type="cannon", level=1,
-                 rng=120.0, dmg=10.0, firerate=1.0):
+                 rng=120.0, dmg=10.0, firerate=1.0, targeting="nearest", splash=0.0):
         self.x = x
         self.y = y
         self.grid = grid
@@ -66,8 +67,13 @@ class Tower:
         self.rng = float(rng)
         self.dmg = float(dmg)
         self.firerate = float(firerate)
+        self.splash = float(splash)  # area damage radius around the target, 0 = single target
         self._cooldown = 0.0
         self.anim = 0.0
+        # Path arc intervals within rng (merged and per segment), set by World.cover()
+        self.coverage = ()
+        self.pieces = ()
+        self.targeting = targeting  # key of td.core.targeting.STRATEGIES
 
     def can_shoot(self):
         return self._cooldown <= 0.0
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+
+# Bump whenever build_default_path_pixels changes what a seed produces.
+CACHE_VERSION = 1
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "modular-td", "maps")
+
+
+class MapCache:
+    """On-disk LRU of generated paths keyed by ``(seed, tile_size, viewport)``.
+
+    Every entry is a small JSON file; reads refresh its mtime so eviction can
+    drop the least recently used files once the directory grows past
+    ``max_bytes``.  Unreadable or mismatching entries count as misses.
+    """
+
+    def __init__(self, directory=None, max_bytes=4 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _key(self, seed, tile_size, viewport):
+        return [CACHE_VERSION, seed, tile_size, [float(v) for v in viewport]]
+
+    def _file(self, key):
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, digest + ".json")
+
+    def get(self, seed, tile_size, viewport):
+        """Return ``(path_pixels, path_cells)`` or ``None`` on a miss."""
+        key = self._key(seed, tile_size, viewport)
+        path = self._file(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            if entry["key"] != key:
+                return None
+            pixels = [tuple(p) for p in entry["pixels"]]
+            cells = [tuple(c) for c in entry["cells"]]
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return pixels, cells
+
+    def put(self, seed, tile_size, viewport, path_pixels, path_cells):
+        key = self._key(seed, tile_size, viewport)
+        path = self._file(key)
+        entry = {"key": key, "pixels": path_pixels, "cells": path_cells}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith(".json"):
+                        st = item.stat()
+                        entries.append((st.st_mtime, st.st_size, item.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith(".json"):
+                        os.unlink(item.path)
+        except OSError:
+            pass
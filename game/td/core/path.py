@@ -1,5 +1,10 @@
 import random
+from bisect import bisect_right
 from collections import deque
+from functools import lru_cache
+
+# Mazes tried per path; with _inflate_path the first one nearly always passes.
+MAX_MAZE_ATTEMPTS = 8
 
 
 def _bfs(adjacency, start):
@@ -44,6 +49,11 @@ def _neighbors(cell, cols, rows):
         yield (x, y + 1)
 
 
+@lru_cache(maxsize=8)
+def _neighbor_table(cols, rows):
+    return {(x, y): tuple(_neighbors((x, y), cols, rows)) for x in range(cols) for y in range(rows)}
+
+
 def _generate_maze(cols, rows, rng):
     adjacency = {(x, y): [] for x in range(cols) for y in range(rows)}
     start_row = rng.randrange(rows)
@@ -55,12 +65,13 @@ def _generate_maze(cols, rows, rng):
     start = (0, start_row)
     goal = (cols - 1, goal_row)
 
+    neighbors = _neighbor_table(cols, rows)
     stack = [(start, None)]
     visited = {start}
 
     while stack:
         cell, prev_dir = stack[-1]
-        options = [n for n in _neighbors(cell, cols, rows) if n not in visited]
+        options = [n for n in neighbors[cell] if n not in visited]
         if options:
             rng.shuffle(options)
             straight = []
@@ -81,23 +92,70 @@ def _generate_maze(cols, rows, rng):
     return adjacency, start, goal
 
 
+def _farthest_of(dist, cells):
+    best = None
+    best_dist = -1
+    for cell in cells:
+        d = dist.get(cell, -1)
+        if d > best_dist:
+            best_dist = d
+            best = cell
+    return best, best_dist
+
+
 def _longest_path_from_left_to_right(adjacency, cols, rows):
-    left_candidates = [(0, r) for r in range(rows)]
-    best_path = []
-    for start in left_candidates:
-        parent, dist = _bfs(adjacency, start)
-        best_end = None
-        best_dist = -1
-        for cell, d in dist.items():
-            if cell[0] == cols - 1 and d > best_dist:
-                best_dist = d
-                best_end = cell
-        if best_end is None:
+    """Longest maze path starting in the left column and ending in the right.
+
+    The maze is a spanning tree, and in a tree the farthest right-column
+    cell from any cell is one of the two ends of the right column's own
+    diameter.  Three BFS runs therefore replace one BFS per left cell.
+    """
+    left = [(0, r) for r in range(rows)]
+    right = [(cols - 1, r) for r in range(rows)]
+    _, dist = _bfs(adjacency, right[0])
+    end_a, _ = _farthest_of(dist, right)
+    parent_a, dist_a = _bfs(adjacency, end_a)
+    end_b, _ = _farthest_of(dist_a, right)
+    parent_b, dist_b = _bfs(adjacency, end_b)
+    start_a, len_a = _farthest_of(dist_a, left)
+    start_b, len_b = _farthest_of(dist_b, left)
+    if start_a is None:
+        return []
+    if len_a >= len_b:
+        path = _reconstruct_path(parent_a, start_a)
+    else:
+        path = _reconstruct_path(parent_b, start_b)
+    path.reverse()
+    return path
+
+
+def _inflate_path(path, target, cols, rows, rng):
+    """Grow ``path`` with random detours until it covers ``target`` cells.
+
+    A detour replaces the step a -> b with a -> a' -> b' -> b, where a' and
+    b' are the free cells beside that step, so the path stays simple and
+    keeps both endpoints.  Gives up after a bounded number of tries.
+    """
+    path = list(path)
+    occupied = set(path)
+    tries = 40 * cols * rows
+    while len(path) < target and tries > 0:
+        tries -= 1
+        i = rng.randrange(len(path) - 1)
+        ax, ay = path[i]
+        bx, by = path[i + 1]
+        dx, dy = bx - ax, by - ay
+        nx, ny = (-dy, dx) if rng.random() < 0.5 else (dy, -dx)
+        a2 = (ax + nx, ay + ny)
+        b2 = (bx + nx, by + ny)
+        if a2 in occupied or b2 in occupied:
             continue
-        candidate = _reconstruct_path(parent, best_end)
-        if len(candidate) > len(best_path):
-            best_path = candidate
-    return best_path
+        if not (0 <= a2[0] < cols and 0 <= b2[0] < cols and 0 <= a2[1] < rows and 0 <= b2[1] < rows):
+            continue
+        path[i + 1:i + 1] = [a2, b2]
+        occupied.add(a2)
+        occupied.add(b2)
+    return path
 
 
 def _maze_diameter(adjacency):
@@ -107,12 +165,100 @@ def _maze_diameter(adjacency):
     return _reconstruct_path(parent, other)
 
 
-def build_default_path_pixels(tile, viewport):
+def path_arc_lengths(path_pixels):
+    """Cumulative distance along ``path_pixels`` up to each waypoint."""
+    lengths = [0.0]
+    total = 0.0
+    for (ax, ay), (bx, by) in zip(path_pixels, path_pixels[1:]):
+        total += ((bx - ax) ** 2 + (by - ay) ** 2) ** 0.5
+        lengths.append(total)
+    return lengths
+
+
+def locate_on_path(path_pixels, lengths, dist, seg=0):
+    """Map a travelled distance to ``(x, y, seg)`` on the path.
+
+    ``seg`` is the segment found last time; since enemies only move forward
+    the search usually advances by zero or one step.  Distances beyond the
+    end are clamped to the final waypoint.
+    """
+    last = len(lengths) - 2
+    if last < 0:
+        x, y = path_pixels[0]
+        return x, y, 0
+    if dist < lengths[seg]:
+        seg = max(0, bisect_right(lengths, dist) - 1)
+    while seg < last and lengths[seg + 1] <= dist:
+        seg += 1
+    start = lengths[seg]
+    span = lengths[seg + 1] - start
+    frac = min(1.0, (dist - start) / span) if span > 0.0 else 1.0
+    ax, ay = path_pixels[seg]
+    bx, by = path_pixels[seg + 1]
+    return ax + (bx - ax) * frac, ay + (by - ay) * frac, seg
+
+
+def path_pieces(path_pixels, lengths, cx, cy, radius, pad=1e-6):
+    """Per-segment arc intervals ``[(start, end, foot), ...]`` inside a circle.
+
+    Each segment is intersected with the circle analytically; ``foot`` is
+    the arc length of the segment point closest to the centre.  Along one
+    straight segment the distance to the centre only falls until ``foot``
+    and rises after it.  ``pad`` widens every interval slightly so that
+    float error can only add candidates, never lose them; callers keep their
+    exact distance check.
+    """
+    r_sq = radius * radius
+    pieces = []
+    for i in range(len(lengths) - 1):
+        ax, ay = path_pixels[i]
+        bx, by = path_pixels[i + 1]
+        dx = bx - ax
+        dy = by - ay
+        fx = ax - cx
+        fy = ay - cy
+        a = dx * dx + dy * dy
+        c = fx * fx + fy * fy - r_sq
+        if a == 0.0:
+            continue
+        b = 2.0 * (fx * dx + fy * dy)
+        disc = b * b - 4.0 * a * c
+        if disc < 0.0:
+            continue
+        root = disc ** 0.5
+        t0 = max(0.0, (-b - root) / (2.0 * a))
+        t1 = min(1.0, (-b + root) / (2.0 * a))
+        if t0 > t1:
+            continue
+        start = lengths[i]
+        span = lengths[i + 1] - start
+        foot = min(t1, max(t0, -b / (2.0 * a)))
+        hi = start + t1 * span + pad
+        if t1 == 1.0 and i == len(lengths) - 2:
+            hi = float("inf")  # enemies that overshot the end wait at the last waypoint
+        pieces.append((start + t0 * span - pad, hi, start + foot * span))
+    return pieces
+
+
+def merge_pieces(pieces):
+    """Join touching :func:`path_pieces` into ``(start, end)`` intervals."""
+    intervals = []
+    for lo, hi, _ in pieces:
+        if intervals and lo <= intervals[-1][1]:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], hi))
+        else:
+            intervals.append((lo, hi))
+    return intervals
+
+
+def build_default_path_pixels(tile, viewport, rng=None):
     """Generate a fresh maze-style path for every run.
 
-    Returns a list of pixel waypoints and the grid coordinates that make up the
-    valid path. Enemies will follow the shortest route through the maze,
-    ensuring their path always lines up with the rendered maze corridor.
+    Returns a list of pixel waypoints, the grid coordinates that make up the
+    valid path and the cumulative arc length at each waypoint. Enemies will
+    follow the shortest route through the maze, ensuring their path always
+    lines up with the rendered maze corridor. Pass a seeded ``rng`` to get
+    the same maze for the same seed.
     """
 
     left, bottom, w, h = viewport
@@ -120,7 +266,8 @@ def build_default_path_pixels(tile, viewport):
     cols = max(14, max(1, usable_w // tile))
     rows = max(16, max(1, int(h // tile)))
 
-    rng = random.Random()
+    if rng is None:
+        rng = random.Random()
     total_cells = cols * rows
     min_length = max(int(total_cells * 0.66), cols + rows)
     min_x_cover = 0.9 if cols >= 18 else 0.75
@@ -132,11 +279,13 @@ def build_default_path_pixels(tile, viewport):
     best_any_score = -1
     path_cells = None
     fallback_path = None
-    for _ in range(160):
+    for _ in range(MAX_MAZE_ATTEMPTS):
         adjacency, _, _ = _generate_maze(cols, rows, rng)
         candidate = _longest_path_from_left_to_right(adjacency, cols, rows)
         if not candidate:
             candidate = _maze_diameter(adjacency)
+        if len(candidate) > 1:
+            candidate = _inflate_path(candidate, min_length, cols, rows, rng)
 
         unique_cells = len(set(candidate))
         if unique_cells < len(candidate):
@@ -181,4 +330,4 @@ def build_default_path_pixels(tile, viewport):
         y = bottom + gy * tile + tile / 2
         path_pixels.append((x, y))
 
-    return path_pixels, path_cells
+    return path_pixels, path_cells, path_arc_lengths(path_pixels)
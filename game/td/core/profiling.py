@@ -0,0 +1,146 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class _NullTimer:
+    """What :meth:`Profiler.phase` hands out while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+        return False
+
+
+class Profiler:
+    """Per-phase frame timings.
+
+    Code to be measured runs inside ``with profiler.phase("name"):``; a phase
+    entered several times per frame (e.g. once per simulation step) is summed
+    up.  :meth:`end_frame` closes the frame: the last ``window`` frames of
+    every phase feed :meth:`stats`, ``totals`` keeps the sums over all frames
+    and, with ``record`` on, every frame is kept for :meth:`dump`.
+
+    While disabled, ``phase`` returns a shared no-op context manager and
+    ``end_frame`` returns immediately, so the hooks can stay in the loop.
+    """
+
+    def __init__(self, enabled=False, window=240, record=False):
+        self.enabled = enabled
+        self.window = window
+        self.record = record
+        self._timers = {}
+        self.reset()
+
+    def reset(self):
+        self.current = {}
+        self.samples = {}  # phase -> deque of the last ``window`` frame times
+        self.totals = {}
+        self.frames = 0
+        self.history = []  # recorded frames, {phase: seconds}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        current = self.current
+        samples = self.samples
+        totals = self.totals
+        for name in current.keys() | samples.keys():
+            seconds = current.get(name, 0.0)
+            queue = samples.get(name)
+            if queue is None:
+                # Phase seen for the first time: earlier frames count as zero
+                queue = samples[name] = deque([0.0] * min(self.frames, self.window), maxlen=self.window)
+            queue.append(seconds)
+            totals[name] = totals.get(name, 0.0) + seconds
+        if self.record:
+            self.history.append(current)
+            self.current = {}
+        else:
+            current.clear()
+        self.frames += 1
+
+    def stats(self):
+        """``{phase: {"mean", "p50", "p95", "p99", "max"}}`` in milliseconds over the window."""
+        result = {}
+        for name, queue in self.samples.items():
+            ordered = sorted(queue)
+            n = len(ordered)
+            if not n:
+                continue
+
+            def pct(q):
+                return ordered[min(n - 1, int(q * n))] * 1e3
+
+            result[name] = {
+                "mean": sum(ordered) / n * 1e3,
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "p99": pct(0.99),
+                "max": ordered[-1] * 1e3,
+            }
+        return result
+
+    def summary(self):
+        """One line per phase, slowest first, for the on-screen overlay."""
+        stats = self.stats()
+        lines = []
+        for name in sorted(stats, key=lambda n: -stats[n]["mean"]):
+            s = stats[name]
+            lines.append(f"{name:<9} {s['mean']:5.2f} ms  p95 {s['p95']:5.2f}  max {s['max']:5.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write the recorded frames as CSV (one row per frame, ms per phase)
+        or, for a ``.json`` path, frames plus stats and totals."""
+        phases = sorted(self.totals)
+        if path.endswith(".json"):
+            data = {
+                "frames": self.frames,
+                "totals_ms": {name: self.totals[name] * 1e3 for name in phases},
+                "stats_ms": self.stats(),
+                "history_ms": [{name: frame.get(name, 0.0) * 1e3 for name in phases}
+                               for frame in self.history],
+            }
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(data, fh, indent=2)
+            return
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["frame"] + phases)
+            for i, frame in enumerate(self.history):
+                writer.writerow([i] + [f"{frame.get(name, 0.0) * 1e3:.4f}" for name in phases])
@@ -0,0 +1,183 @@
+from bisect import bisect_left, bisect_right
+from math import floor
+from operator import attrgetter
+
+_by_dist = attrgetter("dist")
+_NEG_INF = float("-inf")
+
+
+class SpatialHash:
+    """Uniform grid that buckets entities by position for radius queries.
+
+    The grid is rebuilt once per tick from the live enemy list; queries only
+    walk the cells overlapping the query circle, so callers still have to do
+    the exact distance check on what comes back.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self._inv = 1.0 / self.cell_size
+        self.cells = {}
+
+    def rebuild(self, items):
+        cells = self.cells
+        cells.clear()
+        inv = self._inv
+        for item in items:
+            if not item.alive:
+                continue
+            key = (floor(item.x * inv), floor(item.y * inv))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [item]
+            else:
+                bucket.append(item)
+
+    def query(self, x, y, radius):
+        """Yield every item stored in a cell overlapping the given circle."""
+        inv = self._inv
+        cells = self.cells
+        x0 = floor((x - radius) * inv)
+        x1 = floor((x + radius) * inv)
+        y0 = floor((y - radius) * inv)
+        y1 = floor((y + radius) * inv)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    yield from bucket
+
+
+class PathIndex:
+    """Living enemies sorted by distance travelled along the path.
+
+    Enemies only ever stand on the path, so "which enemies are inside this
+    tower's range" becomes a bisect per coverage interval of the tower (see
+    :func:`~td.core.path.merge_pieces`).  Rebuilt once per tick; the list
+    is nearly sorted from the last tick, which makes re-sorting cheap.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.dists = []
+        self.hp = None  # hp per item including hits queued this tick, see touch()
+        self._hp_trees = None
+        self._touched = []
+
+    def rebuild(self, items):
+        alive = [e for e in items if e.alive]
+        alive.sort(key=_by_dist)
+        self.items = alive
+        self.dists = [e.dist for e in alive]
+        self.hp = None
+        self._hp_trees = None
+        self._touched.clear()
+
+    def span(self, start, end):
+        """Index range ``[lo, hi)`` of the items with ``start <= dist <= end``."""
+        lo = bisect_left(self.dists, start)
+        return lo, bisect_right(self.dists, end, lo)
+
+    def locate(self, item):
+        """Position of ``item``, or -1; valid while nobody has moved since rebuild."""
+        dists = self.dists
+        items = self.items
+        i = bisect_left(dists, item.dist)
+        while i < len(items) and dists[i] == item.dist:
+            if items[i] is item:
+                return i
+            i += 1
+        return -1
+
+    def _trees(self):
+        # Built on first use per tick: only hp-based targeting needs them
+        if self._hp_trees is None:
+            self.hp = [e.hp for e in self.items]
+            self._hp_trees = (MaxTree(self.hp), MaxTree([-h for h in self.hp]))
+            for i, item in enumerate(self.items):
+                if not item.alive:
+                    self._set(i, item, item.hp)
+            for item, hp in self._touched:
+                self._set(self.locate(item), item, hp)
+            self._touched.clear()
+        return self._hp_trees
+
+    def _set(self, i, item, hp):
+        if i < 0:
+            return
+        self.hp[i] = hp
+        strongest, weakest = self._hp_trees
+        strongest.update(i, hp if item.alive else _NEG_INF)
+        weakest.update(i, -hp if item.alive else _NEG_INF)
+
+    def touch(self, item, hp=None):
+        """Record that ``item`` now has ``hp`` (default: its current hp);
+        items that are no longer alive drop out of the hp queries."""
+        if hp is None:
+            hp = item.hp
+        if self._hp_trees is None:
+            self._touched.append((item, hp))
+        else:
+            self._set(self.locate(item), item, hp)
+
+    def strongest(self, lo, hi):
+        """Position of the highest-hp item in ``[lo, hi)``, or -1."""
+        return self._trees()[0].argmax(lo, hi)
+
+    def weakest(self, lo, hi):
+        """Position of the lowest-hp item in ``[lo, hi)``, or -1."""
+        return self._trees()[1].argmax(lo, hi)
+
+
+class MaxTree:
+    """Segment tree answering "position of the largest value in [lo, hi)".
+
+    Ties go to the higher position, i.e. the enemy further along the path
+    in a :class:`PathIndex`.  ``-inf`` marks removed entries.
+    """
+
+    def __init__(self, values):
+        size = 1
+        while size < len(values):
+            size *= 2
+        self.size = size
+        self.values = values = list(values) + [_NEG_INF] * (size - len(values))
+        tree = [0] * size + list(range(size))
+        for p in range(size - 1, 0, -1):
+            a = tree[2 * p]
+            b = tree[2 * p + 1]
+            tree[p] = a if values[a] > values[b] else b
+        self.tree = tree
+
+    def update(self, i, value):
+        values = self.values
+        tree = self.tree
+        values[i] = value
+        p = (i + self.size) >> 1
+        while p:
+            a = tree[2 * p]
+            b = tree[2 * p + 1]
+            tree[p] = a if values[a] > values[b] else b
+            p >>= 1
+
+    def argmax(self, lo, hi):
+        values = self.values
+        tree = self.tree
+        best = -1
+        best_value = _NEG_INF
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                i = tree[lo]
+                if values[i] > best_value or (values[i] == best_value and i > best):
+                    best, best_value = i, values[i]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                i = tree[hi]
+                if values[i] > best_value or (values[i] == best_value and i > best):
+                    best, best_value = i, values[i]
+            lo >>= 1
+            hi >>= 1
+        return best if best_value > _NEG_INF else -1
@@ -1,44 +1,103 @@
-from td.util.geometry import vec2_dist
+from td.core.damage import apply_hits, tick_status
+from td.core.enemy_store import STATUS_DEAD, STATUS_END
+from td.core.targeting import acquire_target
 
-def update_world(world, dt):
-    if world.paused or world.lives <= 0:
-        return
+_STATUS_NAMES = {STATUS_DEAD: "dead", STATUS_END: "end"}
 
-    # Spawning and waves
-    world.update_spawning(dt)
 
-    # Towers acquire targets & deal damage
+def update_towers(world, dt):
+    """Tick tower cooldowns; towers that are ready shoot their target.
+
+    Hits are queued and applied together once every tower has fired.
+    """
+    index = world.enemy_index
+    index.rebuild(world.enemies)
+    world.enemy_grid_stale = True
+    hits = world.hits
     for t in world.towers:
         t.update_cooldown(dt)
         if not t.can_shoot():
             continue
-        target = None
-        best = 1e9
-        for e in world.enemies:
-            if not e.alive:
-                continue
-            d = vec2_dist((t.x, t.y), (e.x, e.y))
-            if d <= t.rng and d < best:
-                best = d
-                target = e
+        target = acquire_target(index, t)
         if target is not None:
-            target.take_damage(t.dmg)
+            if t.splash > 0.0:
+                for e in world.enemies_in_radius(target.x, target.y, t.splash):
+                    index.touch(e, hits.damage(e, t.dmg))
+            else:
+                index.touch(target, hits.damage(target, t.dmg))
             if t.tower_type == "slow":
-                target.apply_slow(0.5, 1.0)
+                hits.slow(target, 0.5, 1.0)
             t.shoot()
             world.cb_shoot(t, target)
+    apply_hits(world)
 
-    # Update enemies & handle removal/events
-    new_enemies = []
+
+def move_enemies(world, dt):
+    """Advance every enemy; return ``(enemy, status)`` for the finished ones."""
+    world.enemy_grid_stale = True
+    store = world.enemy_store
+    if store is not None:
+        views = store.views
+        return [(views[i], _STATUS_NAMES[status]) for i, status in store.step(dt)]
+    finished = []
     for e in world.enemies:
         status = e.update(dt)
+        if status != "ok":
+            finished.append((e, status))
+    return finished
+
+
+def remove_enemies(world, finished):
+    """Fire death/leak events for finished enemies and drop them."""
+    if not finished:
+        return
+    for e, status in finished:
         if status == "dead":
             world.cb_death(e)
             world.give_gold(10)
-            continue
-        elif status == "end":
-            world.enemy_reached_end(e)
-            continue
         else:
-            new_enemies.append(e)
-    world.enemies = new_enemies
+            world.enemy_reached_end(e)
+    store = world.enemy_store
+    if store is not None:
+        store.remove([e._i for e, _ in finished])
+    else:
+        # Compact in place and recycle the removed objects
+        enemies = world.enemies
+        gone = {id(e) for e, _ in finished}
+        keep = 0
+        for e in enemies:
+            if id(e) not in gone:
+                enemies[keep] = e
+                keep += 1
+        del enemies[keep:]
+        for e, _ in finished:
+            world.release_enemy(e)
+
+
+def update_world(world, dt):
+    if world.paused or world.lives <= 0:
+        return
+
+    prof = world.profiler
+
+    # Spawning and waves
+    with prof.phase("spawning"):
+        world.update_spawning(dt)
+
+    # Towers acquire targets & deal damage
+    with prof.phase("targeting"):
+        update_towers(world, dt)
+
+    # Update enemies & handle removal/events
+    with prof.phase("movement"):
+        finished = move_enemies(world, dt)
+    with prof.phase("removal"):
+        remove_enemies(world, finished)
+
+    # Slow and hit-flash timers of whoever is left
+    with prof.phase("status"):
+        tick_status(world, dt)
+
+    world.tick += 1
+    if world.recording is not None:
+        world.recording.on_tick(world)
@@ -0,0 +1,148 @@
+"""Target selection for towers.
+
+Every strategy answers "which living enemy in range should this tower
+shoot" from a :class:`~td.core.spatial.PathIndex` and the tower's
+precomputed path coverage, without looking at the enemies outside it:
+
+- ``first``/``last``: the enemy furthest/least far along the path, found by
+  walking in from the ends of the covered index ranges.
+- ``strongest``/``weakest``: a segment tree over hp per covered range.
+- ``nearest``: distance to the tower only falls towards the foot of the
+  perpendicular on each straight path segment and rises after it, so per
+  segment only the enemies right next to that foot need checking.
+
+All strategies still do the exact range check; coverage intervals are
+padded so float error never loses a candidate.
+"""
+
+from bisect import bisect_left, bisect_right
+
+TARGETING_MODES = ("nearest", "first", "last", "strongest", "weakest")
+
+
+def _in_range(e, tower, rng_sq):
+    dx = e.x - tower.x
+    dy = e.y - tower.y
+    return dx * dx + dy * dy <= rng_sq
+
+
+def _nearest_of(items, spans, tower):
+    tx = tower.x
+    ty = tower.y
+    best = tower.rng * tower.rng
+    target = None
+    for lo, hi in spans:
+        for i in range(lo, hi):
+            e = items[i]
+            if not e.alive:
+                continue
+            dx = e.x - tx
+            dy = e.y - ty
+            d = dx * dx + dy * dy
+            if d < best or (d == best and target is None):
+                best = d
+                target = e
+    return target
+
+
+def target_nearest(index, tower):
+    items = index.items
+    spans = [index.span(start, end) for start, end in tower.coverage]
+    if sum(hi - lo for lo, hi in spans) <= 2 * len(tower.pieces):
+        # Few candidates: checking them all beats probing every segment
+        return _nearest_of(items, spans, tower)
+    dists = index.dists
+    probes = []
+    for lo, hi, foot in tower.pieces:
+        a = bisect_left(dists, lo)
+        b = bisect_right(dists, hi, a)
+        if a == b:
+            continue
+        m = bisect_left(dists, foot, a, b)
+        # Nearest living enemy on either side of the foot point
+        for i in range(m, b):
+            if items[i].alive:
+                probes.append((i, i + 1))
+                break
+        for i in range(m - 1, a - 1, -1):
+            if items[i].alive:
+                probes.append((i, i + 1))
+                break
+    return _nearest_of(items, probes, tower)
+
+
+def target_first(index, tower):
+    items = index.items
+    rng_sq = tower.rng * tower.rng
+    for start, end in reversed(tower.coverage):
+        lo, hi = index.span(start, end)
+        for i in range(hi - 1, lo - 1, -1):
+            e = items[i]
+            if e.alive and _in_range(e, tower, rng_sq):
+                return e
+    return None
+
+
+def target_last(index, tower):
+    items = index.items
+    rng_sq = tower.rng * tower.rng
+    for start, end in tower.coverage:
+        lo, hi = index.span(start, end)
+        for i in range(lo, hi):
+            e = items[i]
+            if e.alive and _in_range(e, tower, rng_sq):
+                return e
+    return None
+
+
+def _extreme(index, tower, query, sign):
+    """Best enemy by ``sign * hp`` over the tower's coverage; ties go further along."""
+    items = index.items
+    best = -1
+    for start, end in tower.coverage:
+        lo, hi = index.span(start, end)
+        if lo == hi:
+            continue
+        i = query(lo, hi)
+        hp = index.hp  # built by the first query
+        if i >= 0 and (best < 0 or sign * hp[i] >= sign * hp[best]):
+            best = i
+    if best < 0:
+        return None
+    rng_sq = tower.rng * tower.rng
+    target = items[best]
+    if _in_range(target, tower, rng_sq):
+        return target
+    # Only reachable through the padding of the coverage intervals: settle
+    # it with a scan of the (few) candidates
+    target = -1
+    for start, end in tower.coverage:
+        lo, hi = index.span(start, end)
+        for i in range(lo, hi):
+            e = items[i]
+            if e.alive and _in_range(e, tower, rng_sq) and (
+                    target < 0 or sign * hp[i] >= sign * hp[target]):
+                target = i
+    return items[target] if target >= 0 else None
+
+
+def target_strongest(index, tower):
+    return _extreme(index, tower, index.strongest, 1.0)
+
+
+def target_weakest(index, tower):
+    return _extreme(index, tower, index.weakest, -1.0)
+
+
+STRATEGIES = {
+    "nearest": target_nearest,
+    "first": target_first,
+    "last": target_last,
+    "strongest": target_strongest,
+    "weakest": target_weakest,
+}
+
+
+def acquire_target(index, tower):
+    """Return the living enemy in range ``tower`` should shoot, or ``None``."""
+    return STRATEGIES[tower.targeting](index, tower)
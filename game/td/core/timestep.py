@@ -0,0 +1,39 @@
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed simulation steps.
+
+    Frame time is collected in an accumulator; :meth:`advance` returns how
+    many steps of ``step`` seconds to run and leaves the remainder for the
+    next frame.  ``alpha`` is that remainder as a fraction of a step, used to
+    interpolate between the last two simulated states when drawing.
+
+    At most ``max_steps`` steps are run per frame; anything beyond that is
+    dropped (and summed up in ``dropped``) so a slow machine falls behind
+    real time instead of spiralling into ever longer frames.
+    """
+
+    def __init__(self, hz=60.0, max_steps=5):
+        self.max_steps = max_steps
+        self.set_rate(hz)
+        self.reset()
+
+    def set_rate(self, hz):
+        self.hz = float(hz)
+        self.step = 1.0 / self.hz
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.dropped = 0.0
+
+    def advance(self, frame_dt):
+        self.accumulator += frame_dt
+        # Tiny epsilon so frames of exactly one step don't alternate 0/2 steps
+        steps = int((self.accumulator + 1e-9) / self.step)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator = max(0.0, self.accumulator - steps * self.step)
+        self.alpha = min(1.0, self.accumulator / self.step)
+        return steps
@@ -1,16 +1,43 @@
 import random
 
-from td.core.path import build_default_path_pixels
+from td.core.damage import HitQueue
+from td.core.path import build_default_path_pixels, merge_pieces, path_arc_lengths, path_pieces
 from td.core.entities import Enemy, Tower
+from td.core.enemy_store import EnemyStore
+from td.core.profiling import Profiler
+from td.core.spatial import PathIndex, SpatialHash
+from td.core.targeting import TARGETING_MODES
+
+TARGETING_LABELS = {
+    "nearest": "nächster",
+    "first": "vorderster",
+    "last": "hinterster",
+    "strongest": "stärkster",
+    "weakest": "schwächster",
+}
 
 class World:
-    def __init__(self, viewport=(0,0,960,720), shoot_cb=None, death_cb=None):
+    def __init__(self, viewport=(0,0,960,720), shoot_cb=None, death_cb=None, array_enemies=False,
+                 seed=None, map_cache=None, profiler=None):
         self.viewport = viewport
+        # Phase timings of update_world (and the screen's frame); off unless enabled
+        self.profiler = profiler if profiler is not None else Profiler()
         self.tile_size = 48
 
+        # Randomness: one seed drives the maze, enemy rolls and visual effects.
+        # Without a seed every World (and every reset) picks a fresh one.
+        self._seed_fixed = seed is not None
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        seeder = random.Random(self.seed)
+        path_rng = random.Random(seeder.getrandbits(64))
+        self.rng = random.Random(seeder.getrandbits(64))
+        self.fx_rng = random.Random(seeder.getrandbits(64))  # cosmetic only, never feeds the sim
+
         # Game state
         self.enemies = []
-        self.towers = []
+        # Towers keyed by grid cell; ``towers`` is a live view in placement order
+        self.tower_grid = {}
+        self.towers = self.tower_grid.values()
         self.gold = 250
         self.lives = 20
         self.wave_number = 0
@@ -18,18 +45,62 @@ class World:
         self.paused = False
         self.status_text = ""
         self.selected_tower = None
+        # Simulation steps run so far; player inputs are stamped with it
+        self.tick = 0
+        # Replay recorder (see td.replay), fed every player input and tick
+        self.recording = None
 
         # Tower definitions
         self.tower_types = {
             "cannon": {"cost": 50, "rng": 140, "dmg": 15, "firerate": 1.0},
             "slow": {"cost": 65, "rng": 120, "dmg": 5, "firerate": 0.8},
+            # Hits every enemy within ``splash`` pixels of its target
+            "splash": {"cost": 90, "rng": 120, "dmg": 9, "firerate": 0.6, "splash": 56},
         }
         self.build_tower_type = "cannon"
+        # Wave formulas, per wave n: hp = base_hp + hp_per_wave*(n-1), likewise
+        # count and speed; the spawn interval shrinks by interval_step down to
+        # min_interval
+        self.wave_rules = {
+            "base_hp": 50, "hp_per_wave": 15,
+            "base_count": 8, "count_per_wave": 2,
+            "base_speed": 60, "speed_per_wave": 4,
+            "base_interval": 0.62, "interval_step": 0.03, "min_interval": 0.28,
+        }
 
-        # Path and blocked tiles
-        self.path_pixels, self.path_grid = build_default_path_pixels(self.tile_size, viewport)
+        # Path and blocked tiles; only seeded layouts are worth caching
+        self.map_cache = map_cache
+        cached = None
+        if map_cache is not None and self._seed_fixed:
+            cached = map_cache.get(self.seed, self.tile_size, viewport)
+        if cached is not None:
+            self.path_pixels, self.path_grid = cached
+            self.path_lengths = path_arc_lengths(self.path_pixels)
+        else:
+            self.path_pixels, self.path_grid, self.path_lengths = build_default_path_pixels(
+                self.tile_size, viewport, rng=path_rng)
+            if map_cache is not None and self._seed_fixed:
+                map_cache.put(self.seed, self.tile_size, viewport, self.path_pixels, self.path_grid)
         self.blocked = set(self.path_grid)  # can't place towers on path
 
+        # Enemies ordered along the path for target queries, rebuilt every tick
+        self.enemy_index = PathIndex()
+        # Buckets for radius queries; rebuilt on the first query after enemies moved
+        self.enemy_grid = SpatialHash(self.tile_size)
+        self.enemy_grid_stale = True
+        # Hits queued by towers this tick, and object enemies with running timers
+        self.hits = HitQueue()
+        self.timed_enemies = {}
+
+        # Optional NumPy column storage; world.enemies then holds its views
+        self.array_enemies = array_enemies
+        self.enemy_store = EnemyStore(self.path_pixels, self.path_lengths) if array_enemies else None
+        if self.enemy_store is not None:
+            self.enemies = self.enemy_store.views
+        # Removed Enemy objects wait here to be recycled by spawn_enemy
+        self._enemy_pool = []
+        self._enemy_serial = 0
+
         # Callbacks for SFX/visual feedback
         self.cb_shoot = shoot_cb if shoot_cb else (lambda *args, **kwargs: None)
         self.cb_death = death_cb if death_cb else (lambda *args, **kwargs: None)
@@ -41,29 +112,68 @@ class World:
         self._wave_cooldown = 2.0
 
     def reset(self):
-        self.__init__(viewport=self.viewport, shoot_cb=self.cb_shoot, death_cb=self.cb_death)
+        self.__init__(viewport=self.viewport, shoot_cb=self.cb_shoot, death_cb=self.cb_death,
+                      array_enemies=self.array_enemies, seed=self.seed if self._seed_fixed else None,
+                      map_cache=self.map_cache, profiler=self.profiler)
+
+    def _record(self, op, *args):
+        if self.recording is not None:
+            self.recording.event(self.tick, op, args)
+
+    def set_paused(self, paused):
+        self._record("pause" if paused else "resume")
+        self.paused = paused
 
     def cycle_tower_type(self):
+        self._record("cycle_type")
         keys = list(self.tower_types.keys())
         idx = keys.index(self.build_tower_type)
         self.build_tower_type = keys[(idx + 1) % len(keys)]
         self.status_text = f"Tower: {self.build_tower_type}"
 
+    def cycle_targeting(self, tower):
+        idx = TARGETING_MODES.index(tower.targeting)
+        self.set_targeting(tower, TARGETING_MODES[(idx + 1) % len(TARGETING_MODES)])
+        self.status_text = f"Ziel: {TARGETING_LABELS[tower.targeting]}"
+
+    def set_targeting(self, tower, mode):
+        self._record("targeting", tower.grid[0], tower.grid[1], mode)
+        tower.targeting = mode
+
     def get_tower_at(self, grid_pos):
-        for t in self.towers:
-            if t.grid == grid_pos:
-                return t
-        return None
+        return self.tower_grid.get(grid_pos)
 
     def get_tower_stats(self, t_type, level):
         base = self.tower_types[t_type]
         dmg = base["dmg"] * (1 + 0.15 * (level - 1))
         rng = base["rng"] * (1 + 0.05 * (level - 1))
         firerate = base["firerate"] * (1 + 0.03 * (level - 1))
-        return dict(rng=rng, dmg=dmg, firerate=firerate)
+        splash = base.get("splash", 0.0) * (1 + 0.04 * (level - 1))
+        return dict(rng=rng, dmg=dmg, firerate=firerate, splash=splash)
+
+    def enemies_in_radius(self, x, y, r):
+        """Living enemies within ``r`` of ``(x, y)``.
+
+        Served by the spatial hash, so the cost is a walk over the buckets
+        the circle touches rather than a pass over every enemy.
+        """
+        grid = self.enemy_grid
+        if self.enemy_grid_stale:
+            grid.rebuild(self.enemies)
+            self.enemy_grid_stale = False
+        r_sq = r * r
+        found = []
+        for e in grid.query(x, y, r):
+            if e.alive:
+                dx = e.x - x
+                dy = e.y - y
+                if dx * dx + dy * dy <= r_sq:
+                    found.append(e)
+        return found
 
     def place_tower(self, grid_pos):
         gx, gy = grid_pos
+        self._record("place", gx, gy, self.build_tower_type)
         left, bottom, w, h = self.viewport
         max_gx = int((w*0.75) // self.tile_size) - 1
         max_gy = int(h // self.tile_size) - 1
@@ -73,7 +183,7 @@ class World:
         if (gx, gy) in self.blocked:
             self.status_text = "Pfad/Blockiert."
             return False
-        if self.get_tower_at((gx, gy)):
+        if (gx, gy) in self.tower_grid:
             self.status_text = "Belegt."
             return False
         tdef = self.tower_types[self.build_tower_type]
@@ -81,55 +191,81 @@ class World:
         if self.gold < cost:
             self.status_text = "Zu wenig Gold."
             return False
-        x = left + gx * self.tile_size + self.tile_size/2
-        y = bottom + gy * self.tile_size + self.tile_size/2
-        stats = self.get_tower_stats(self.build_tower_type, 1)
-        self.towers.append(Tower(x=x, y=y, grid=(gx, gy), tower_type=self.build_tower_type,
-                                 level=1, **stats))
+        self._add_tower((gx, gy), self.build_tower_type, 1)
         self.gold -= cost
         self.status_text = ""
         return True
 
     def try_fuse(self, t1, t2):
+        self._record("fuse", t1.grid[0], t1.grid[1], t2.grid[0], t2.grid[1])
         if not t1.mergeable(t2):
             self.status_text = "Fusion nicht möglich"
             return False
-        gx, gy = t2.grid
-        x = self.viewport[0] + gx * self.tile_size + self.tile_size/2
-        y = self.viewport[1] + gy * self.tile_size + self.tile_size/2
         new_level = t1.level + 1
-        stats = self.get_tower_stats(t1.tower_type, new_level)
-        self.towers.remove(t1)
-        self.towers.remove(t2)
-        self.towers.append(Tower(x=x, y=y, grid=(gx, gy), tower_type=t1.tower_type,
-                                 level=new_level, **stats))
+        del self.tower_grid[t1.grid]
+        del self.tower_grid[t2.grid]
+        self._add_tower(t2.grid, t1.tower_type, new_level, t2.targeting)
         self.status_text = f"{t1.tower_type} L{new_level}"
         return True
 
+    def _add_tower(self, grid_pos, t_type, level, targeting="nearest"):
+        gx, gy = grid_pos
+        x = self.viewport[0] + gx * self.tile_size + self.tile_size/2
+        y = self.viewport[1] + gy * self.tile_size + self.tile_size/2
+        stats = self.get_tower_stats(t_type, level)
+        tower = Tower(x=x, y=y, grid=(gx, gy), tower_type=t_type, level=level, targeting=targeting, **stats)
+        self.cover(tower)
+        self.tower_grid[(gx, gy)] = tower
+        return tower
+
+    def cover(self, tower):
+        """Precompute the stretches of path within the tower's range.
+
+        Towers and the path never move, so this only has to be redone when
+        ``rng`` changes.
+        """
+        tower.pieces = path_pieces(self.path_pixels, self.path_lengths, tower.x, tower.y, tower.rng)
+        tower.coverage = merge_pieces(tower.pieces)
+
     def start_next_wave(self):
         self.wave_number += 1
-        base_hp = 50 + 15 * (self.wave_number-1)
-        count = 8 + 2 * self.wave_number
-        speed = 60 + 4 * self.wave_number
+        n = self.wave_number
+        rules = self.wave_rules
+        base_hp = rules["base_hp"] + rules["hp_per_wave"] * (n - 1)
+        count = rules["base_count"] + rules["count_per_wave"] * n
+        speed = rules["base_speed"] + rules["speed_per_wave"] * n
         self._enemies_to_spawn = count
         self._spawn_timer = 0.0
-        self._spawn_interval = max(0.28, 0.62 - 0.03 * self.wave_number)
+        self._spawn_interval = max(rules["min_interval"], rules["base_interval"] - rules["interval_step"] * n)
         self._wave_cooldown = 9.0  # disabled during active spawns
         self._pending_enemy_stats = (base_hp, speed)
 
     def spawn_enemy(self):
         if self._enemies_to_spawn <= 0:
             return
-        start = self.path_pixels[0]
         hp, speed = self._pending_enemy_stats
-        etype = "fast" if random.random() < 0.3 else "normal"
+        etype = "fast" if self.rng.random() < 0.3 else "normal"
         if etype == "fast":
             hp *= 0.6
             speed *= 1.4
-        e = Enemy(x=start[0], y=start[1], hp=hp, speed=speed,
-                  waypoints=self.path_pixels, enemy_type=etype)
-        self.enemies.append(e)
+        self._enemy_serial += 1
+        if self.enemy_store is not None:
+            self.enemy_store.spawn(hp=hp, speed=speed, enemy_type=etype, uid=self._enemy_serial)
+        elif self._enemy_pool:
+            e = self._enemy_pool.pop()
+            e.respawn(hp, speed, self.path_pixels, self.path_lengths, etype, uid=self._enemy_serial)
+            self.enemies.append(e)
+        else:
+            e = Enemy(hp=hp, speed=speed, waypoints=self.path_pixels,
+                      lengths=self.path_lengths, enemy_type=etype, uid=self._enemy_serial)
+            self.enemies.append(e)
         self._enemies_to_spawn -= 1
+        self.enemy_grid_stale = True
+
+    def release_enemy(self, enemy):
+        """Hand a removed Enemy back for reuse; it must not be referenced anymore."""
+        enemy.alive = False
+        self._enemy_pool.append(enemy)
 
     def update_spawning(self, dt):
         if self._enemies_to_spawn > 0:
@@ -0,0 +1,310 @@
+"""Batched Mesh rendering for enemies, projectiles and explosions.
+
+Instead of a handful of instructions per entity, every visual layer (all
+enemy bodies of one palette, all health bars, all projectiles of one fade
+level, ...) is a single :class:`Mesh` whose vertex buffer is rebuilt each
+frame with NumPy.  The number of draw calls therefore depends on the number
+of layers, not on the number of enemies; a layer only splits into a second
+Mesh when it exceeds the 65535-index limit of OpenGL ES 2.
+
+NumPy is optional: :data:`AVAILABLE` is ``False`` without it and
+:class:`~td.screens.game.GameWidget` keeps using the pooled sprites from
+:mod:`td.screens.render`.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from kivy.graphics import Color, InstructionGroup, Mesh
+
+from td.core.damage import HIT_FLASH
+
+AVAILABLE = np is not None
+
+ELLIPSE_SEGMENTS = 16
+MAX_INDICES = 65535
+FLASH_LEVELS = 3
+FADE_LEVELS = 4
+
+if AVAILABLE:
+    _ANGLES = np.linspace(0.0, 2.0 * np.pi, ELLIPSE_SEGMENTS, endpoint=False)
+    _UNIT_X = np.cos(_ANGLES)
+    _UNIT_Y = np.sin(_ANGLES)
+    # Triangle fan around vertex 0 (the centre), spelled out as triangles
+    _ELLIPSE_INDICES = [i for k in range(ELLIPSE_SEGMENTS)
+                        for i in (0, 1 + k, 1 + (k + 1) % ELLIPSE_SEGMENTS)]
+    _QUAD_INDICES = [0, 1, 2, 0, 2, 3]
+
+
+class MeshLayer:
+    """Triangles of one colour and texture, drawn from a float32 buffer.
+
+    Callers fill ``buffer(shapes)`` -- shape ``(shapes, verts, 4)`` holding
+    ``x, y, u, v`` per vertex -- and then call :meth:`commit`.
+    """
+
+    def __init__(self, parent, rgba, indices, verts, texture=None, uvs=None):
+        self.group = InstructionGroup()
+        self.color = Color(*rgba)
+        self.group.add(self.color)
+        parent.add(self.group)
+        self.verts = verts
+        self.texture = texture
+        self.uvs = uvs
+        template = np.asarray(indices, dtype=np.int64)
+        self.per_mesh = min(MAX_INDICES // len(template), MAX_INDICES // verts)
+        offsets = verts * np.arange(self.per_mesh)[:, None]
+        self.indices = (template[None, :] + offsets).astype(np.uint16).ravel()
+        self._stride = len(template)
+        self._buffer = np.zeros((0, verts, 4), dtype=np.float32)
+        self.meshes = []
+        self._live = []
+
+    def buffer(self, shapes):
+        if shapes > len(self._buffer):
+            grown = np.zeros((max(shapes, 2 * len(self._buffer), 64), self.verts, 4), dtype=np.float32)
+            if self.uvs is not None:
+                grown[:, :, 2:] = self.uvs
+            self._buffer = grown
+        return self._buffer[:shapes]
+
+    def commit(self, shapes):
+        needed = -(-shapes // self.per_mesh)
+        while len(self.meshes) < needed:
+            mesh = Mesh(mode="triangles", texture=self.texture)
+            self.meshes.append(mesh)
+            self._live.append(False)
+            self.group.add(mesh)
+        flat = self._buffer.reshape(-1)
+        chunk = self.per_mesh * self.verts * 4
+        for i, mesh in enumerate(self.meshes):
+            count = min(self.per_mesh, shapes - i * self.per_mesh)
+            if count > 0:
+                mesh.vertices = flat[i * chunk:i * chunk + count * self.verts * 4]
+                mesh.indices = self.indices[:count * self._stride]
+                self._live[i] = True
+            elif self._live[i]:
+                mesh.vertices = []
+                mesh.indices = []
+                self._live[i] = False
+
+
+def ellipse_layer(parent, rgba):
+    return MeshLayer(parent, rgba, _ELLIPSE_INDICES, ELLIPSE_SEGMENTS + 1)
+
+
+def quad_layer(parent, rgba, texture=None):
+    uvs = None
+    if texture is not None:
+        uvs = np.asarray(texture.tex_coords, dtype=np.float32).reshape(4, 2)
+    return MeshLayer(parent, rgba, _QUAD_INDICES, 4, texture=texture, uvs=uvs)
+
+
+def _ellipses(out, x, y, cos, sin, ox, oy, w, h):
+    """Write rotated ellipses given Kivy-style ``pos``/``size`` in local space."""
+    rx = w * 0.5
+    ry = h * 0.5
+    cx = (ox + rx)[:, None]
+    cy = (oy + ry)[:, None]
+    lx = np.concatenate((cx, cx + rx[:, None] * _UNIT_X), axis=1)
+    ly = np.concatenate((cy, cy + ry[:, None] * _UNIT_Y), axis=1)
+    cos = cos[:, None]
+    sin = sin[:, None]
+    out[:, :, 0] = x[:, None] + lx * cos - ly * sin
+    out[:, :, 1] = y[:, None] + lx * sin + ly * cos
+
+
+def _segments(out, px, py, qx, qy, half_width):
+    """Write each segment p->q as a quad ``half_width`` to either side."""
+    dx = qx - px
+    dy = qy - py
+    length = np.hypot(dx, dy)
+    length[length == 0.0] = 1.0
+    nx = -dy / length * half_width
+    ny = dx / length * half_width
+    out[:, 0, 0] = px + nx
+    out[:, 0, 1] = py + ny
+    out[:, 1, 0] = qx + nx
+    out[:, 1, 1] = qy + ny
+    out[:, 2, 0] = qx - nx
+    out[:, 2, 1] = qy - ny
+    out[:, 3, 0] = px - nx
+    out[:, 3, 1] = py - ny
+
+
+def _rects(out, x, y, w, h):
+    out[:, 0, 0] = x
+    out[:, 0, 1] = y
+    out[:, 1, 0] = x + w
+    out[:, 1, 1] = y
+    out[:, 2, 0] = x + w
+    out[:, 2, 1] = y + h
+    out[:, 3, 0] = x
+    out[:, 3, 1] = y + h
+
+
+class _InsectLayers:
+    """Body part layers for one enemy palette."""
+
+    def __init__(self, parent, palette):
+        body = palette.get("body", (0.14, 0.1, 0.07))
+        accent = palette.get("accent", (0.7, 0.9, 0.6))
+        wing = palette.get("wing", (0.9, 0.95, 1.0, 0.4))
+        if len(wing) == 3:
+            wing = (wing[0], wing[1], wing[2], 0.4)
+        self.body = ellipse_layer(parent, (body[0], body[1], body[2], 1))
+        self.abdomen = ellipse_layer(parent, (min(1.0, body[0] * 1.1), min(1.0, body[1] * 1.1),
+                                              min(1.0, body[2] * 1.1), 0.95))
+        self.accent = ellipse_layer(parent, (min(1.0, accent[0]), min(1.0, accent[1]),
+                                             min(1.0, accent[2]), 0.85))
+        self.head = ellipse_layer(parent, (accent[0] * 0.9, accent[1] * 0.9, accent[2] * 0.9, 0.9))
+        self.wings = ellipse_layer(parent, wing)
+        self.legs = quad_layer(parent, (body[0] * 0.6, body[1] * 0.6, body[2] * 0.6, 1))
+
+
+class EnemyBatch:
+    """All enemies in a constant number of Mesh layers.
+
+    Geometry matches :class:`~td.screens.render.EnemySprite`; the rotation
+    that sprite does with a ``Rotate`` instruction is baked into the
+    vertices here.  Hit-flash alpha is quantised to :data:`FLASH_LEVELS`.
+    """
+
+    def __init__(self, parent, palettes):
+        self.group = InstructionGroup()
+        parent.add(self.group)
+        self.shadow = ellipse_layer(self.group, (0, 0, 0, 0.25))
+        self.palettes = {kind: _InsectLayers(self.group, palette) for kind, palette in palettes.items()}
+        self.flash = [ellipse_layer(self.group, (1.0, 0.4, 0.2, 0.35 * (i + 1) / FLASH_LEVELS))
+                      for i in range(FLASH_LEVELS)]
+        self.bar_bg = quad_layer(self.group, (0.08, 0.03, 0.01, 1))
+        self.bar = quad_layer(self.group, (0.82, 0.16, 0.26, 1))
+
+    def update(self, enemies, states, positions, tile):
+        """Rebuild every layer from ``enemies``, their animation ``states`` and
+        the ``(x, y)`` ``positions`` to draw them at."""
+        n = len(enemies)
+        rows = np.array([(px, py, e.hp / e.max_hp, st["dir"][0], st["dir"][1], st["bob"],
+                          st["phase"], st["wing"], st.get("flash", 0.0))
+                         for e, (px, py), st in zip(enemies, positions, states)],
+                        dtype=np.float64).reshape(n, 9)
+        x, y, hp, cos, sin, bob, phase, wing, flash = rows.T
+        kinds = [e.enemy_type if e.enemy_type in self.palettes else "normal" for e in enemies]
+        scale = np.array([1.05 if e.enemy_type == "normal" else 0.95 for e in enemies]) * tile
+
+        # Shadows are not rotated
+        shadow_w = np.full(n, tile * 0.82)
+        shadow_h = np.full(n, tile * 0.34)
+        _ellipses(self.shadow.buffer(n), x, y, np.ones(n), np.zeros(n),
+                  -shadow_w / 2, -shadow_h / 2 - 4, shadow_w, shadow_h)
+        self.shadow.commit(n)
+
+        kinds = np.array(kinds, dtype=object)
+        for kind, layers in self.palettes.items():
+            idx = np.flatnonzero(kinds == kind)
+            self._insects(layers, x[idx], y[idx], cos[idx], sin[idx], bob[idx],
+                          phase[idx], wing[idx], scale[idx])
+
+        intensity = np.minimum(1.0, flash / HIT_FLASH)
+        level = np.ceil(intensity * FLASH_LEVELS).astype(np.int64) - 1
+        for i, layer in enumerate(self.flash):
+            idx = np.flatnonzero((flash > 0.0) & (level == i))
+            s = scale[idx]
+            length = s * 1.05
+            width = s * 0.55
+            out = layer.buffer(idx.size)
+            _ellipses(out, x[idx], y[idx], cos[idx], sin[idx], -length * 0.55,
+                      -width * 0.5 + bob[idx], length * 0.85, width * 0.95)
+            layer.commit(idx.size)
+
+        bar_width = tile * 0.92
+        bar_x = x - bar_width / 2
+        bar_y = y + tile * 0.6
+        _rects(self.bar_bg.buffer(n), bar_x, bar_y, bar_width, 6.0)
+        self.bar_bg.commit(n)
+        _rects(self.bar.buffer(n), bar_x, bar_y, bar_width * np.maximum(0.0, hp), 6.0)
+        self.bar.commit(n)
+
+    @staticmethod
+    def _insects(layers, x, y, cos, sin, bob, phase, wing, scale):
+        n = x.size
+        body_len = scale * 1.05
+        body_width = scale * 0.55
+        head = scale * 0.35
+        abdomen_len = scale * 0.7
+
+        _ellipses(layers.body.buffer(n), x, y, cos, sin,
+                  -body_len * 0.65, -body_width / 2 + bob, body_len, body_width)
+        layers.body.commit(n)
+        _ellipses(layers.abdomen.buffer(n), x, y, cos, sin,
+                  -abdomen_len * 0.95, -body_width * 0.48 + bob, abdomen_len, body_width * 0.92)
+        layers.abdomen.commit(n)
+        _ellipses(layers.accent.buffer(n), x, y, cos, sin,
+                  -body_len * 0.25, -body_width * 0.38 + bob, body_len * 0.5, body_width * 0.76)
+        layers.accent.commit(n)
+        _ellipses(layers.head.buffer(n), x, y, cos, sin,
+                  scale * 0.32 - head / 2, -head / 2 + bob, head, head)
+        layers.head.commit(n)
+
+        span = scale * 0.85
+        wing_h = scale * 0.55 + np.sin(wing) * scale * 0.08
+        out = layers.wings.buffer(2 * n)
+        _ellipses(out[:n], x, y, cos, sin, -scale * 0.15 - span / 2, body_width * 0.1 + bob, span, wing_h)
+        _ellipses(out[n:], x, y, cos, sin, -scale * 0.15 - span / 2,
+                  -body_width * 0.1 - wing_h + bob, span, wing_h)
+        layers.wings.commit(2 * n)
+
+        # Six legs of two segments each, rotated into place before widening
+        leg_len = scale * 0.6
+        out = layers.legs.buffer(12 * n)
+        block = 0
+        for i, anchor in enumerate((-0.3, -0.05, 0.22)):
+            ax = scale * anchor
+            foot = body_width * 0.6 + np.sin(phase + i * 1.2) * body_width * 0.35
+            for side in (1.0, -1.0):
+                lx = (ax, ax - leg_len * 0.3, ax - leg_len * 0.6)
+                ly = (bob, side * foot + bob, side * foot * 0.8 + bob)
+                wx = [x + lx[k] * cos - ly[k] * sin for k in range(3)]
+                wy = [y + lx[k] * sin + ly[k] * cos for k in range(3)]
+                for k in range(2):
+                    _segments(out[block * n:(block + 1) * n], wx[k], wy[k], wx[k + 1], wy[k + 1], 1.6)
+                    block += 1
+        layers.legs.commit(12 * n)
+
+
+class QuadBatch:
+    """Fading textured quads (or ellipses without a texture) in a few layers.
+
+    Alpha is quantised to :data:`FADE_LEVELS`, one Mesh layer per level.
+    """
+
+    def __init__(self, parent, texture=None, fallback_scale=1.0):
+        self.group = InstructionGroup()
+        parent.add(self.group)
+        self.fallback_scale = fallback_scale
+        self.textured = texture is not None
+        alphas = [(i + 1) / FADE_LEVELS for i in range(FADE_LEVELS)]
+        if self.textured:
+            self.layers = [quad_layer(self.group, (1, 1, 1, a), texture) for a in alphas]
+        else:
+            self.layers = [ellipse_layer(self.group, (1, 1, 1, a)) for a in alphas]
+
+    def update(self, items):
+        """``items`` is a sequence of ``(x, y, size, alpha)`` tuples."""
+        data = np.array(items, dtype=np.float64).reshape(-1, 4)
+        x, y, size, alpha = data.T
+        if not self.textured:
+            size = size * self.fallback_scale
+        level = np.ceil(alpha * FADE_LEVELS).astype(np.int64) - 1
+        for i, layer in enumerate(self.layers):
+            idx = np.flatnonzero((alpha > 0.0) & (level == i))
+            s = size[idx]
+            out = layer.buffer(idx.size)
+            if self.textured:
+                _rects(out, x[idx] - s / 2, y[idx] - s / 2, s, s)
+            else:
+                _ellipses(out, x[idx], y[idx], np.ones(idx.size), np.zeros(idx.size),
+                          -s / 2, -s / 2, s, s)
+            layer.commit(idx.size)
@@ -0,0 +1,59 @@
+"""Recycled records for the short-lived visual effects of :class:`GameWidget`.
+
+Shots, splats and explosions are spawned by the dozen per second in heavy
+waves; instead of a dict (plus a list of drops) per event they are slotted
+records handed out by a :class:`RecordPool` and returned when they expire.
+"""
+
+
+class ShotEffect:
+    __slots__ = ("start", "end", "pos", "time", "duration", "progress", "size")
+
+
+class Splat:
+    __slots__ = ("pos", "time", "duration", "progress", "radius", "color", "drops")
+
+    def __init__(self, drops=6):
+        # [x, y, size] per droplet, rewritten in place on reuse
+        self.drops = [[0.0, 0.0, 0.0] for _ in range(drops)]
+
+
+class Explosion:
+    __slots__ = ("pos", "time", "duration", "progress", "size")
+
+
+class RecordPool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+
+    def acquire(self, duration):
+        record = self.free.pop() if self.free else self.factory()
+        record.time = 0.0
+        record.progress = 0.0
+        record.duration = duration
+        return record
+
+    def release(self, record):
+        self.free.append(record)
+
+
+def age_records(records, pool, dt):
+    """Advance ``time``/``progress`` by ``dt``; expired records go back to
+    ``pool`` and ``records`` is compacted in place."""
+    keep = 0
+    for record in records:
+        record.time += dt
+        record.progress = record.time / record.duration
+        if record.progress >= 1.0:
+            pool.release(record)
+        else:
+            records[keep] = record
+            keep += 1
+    del records[keep:]
+
+
+def release_all(records, pool):
+    for record in records:
+        pool.release(record)
+    records.clear()
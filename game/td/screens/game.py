@@ -1,18 +1,28 @@
+import io
 import os
 import math
-import random
+import time
 
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
-from kivy.properties import NumericProperty, StringProperty, ObjectProperty
+from kivy.properties import BooleanProperty, NumericProperty, StringProperty, ObjectProperty
 from kivy.clock import Clock
-from kivy.graphics import Color, Rectangle, Ellipse, Line, PushMatrix, PopMatrix, Rotate
+from kivy.atlas import Atlas
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle, Ellipse, Line, InstructionGroup
 from kivy.core.image import Image as CoreImage
 from kivy.core.audio import SoundLoader
 from kivy.logger import Logger
 
 from td.core.world import World
 from td.core.systems import update_world
+from td.core.timestep import FixedTimestep
+from td.replay import Recorder
+from td.screens.render import InstructionPool, TowerSprite, EnemySprite, SplatSprite, BlastSprite
+from td.screens.batch import AVAILABLE as BATCH_AVAILABLE, EnemyBatch, QuadBatch
+from td.screens.effects import Explosion, RecordPool, ShotEffect, Splat, age_records, release_all
+from td.tools.atlas import ATLASES, atlas_path
+from td.util.bundle import default_bundle
 from td.util.resources import resource_path
 
 class GameWidget(Widget):
@@ -21,13 +31,21 @@ class GameWidget(Widget):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Load external artwork if available
+        bundle = default_bundle()
+
         def load_tex(*parts, linear=True, wrap=True):
             path = resource_path(*parts)
-            if not os.path.exists(path):
-                Logger.warning("game: missing asset '%s'", path)
-                return None
+            name = "/".join(parts)
             try:
-                img = CoreImage(path)
+                if bundle is not None and name in bundle:
+                    # Decoded straight from the mapped bundle, no file to open
+                    ext = os.path.splitext(name)[1].lstrip(".")
+                    img = CoreImage(io.BytesIO(bundle.view(name)), ext=ext, filename=name)
+                elif os.path.exists(path):
+                    img = CoreImage(path)
+                else:
+                    Logger.warning("game: missing asset '%s'", path)
+                    return None
             except Exception as exc:
                 Logger.warning("game: failed to load '%s': %s", path, exc)
                 return None
@@ -55,16 +73,36 @@ class GameWidget(Widget):
         else:
             self.path_tex = None
 
+        # Sprites come from the atlases (td.tools.atlas) when they were built,
+        # so every tower, shot and blast samples the same few textures
+        regions = {}
+        for name, (linear, _) in ATLASES.items():
+            path = atlas_path(name)
+            if not path.exists():
+                continue
+            try:
+                atlas = Atlas(str(path))
+            except Exception as exc:
+                Logger.warning("game: failed to load atlas '%s': %s", path, exc)
+                continue
+            for page in atlas.original_textures:
+                page.mag_filter = page.min_filter = "linear" if linear else "nearest"
+            regions.update(atlas.textures)
+
+        def load_sprite(region, *parts, linear=True):
+            tex = regions.get(region)
+            return tex if tex is not None else load_tex(*parts, linear=linear, wrap=False)
+
         self.tower_textures = {
-            "cannon": load_tex("assets", "textures", "tower_cannon.png", linear=False, wrap=False),
-            "slow": load_tex("assets", "textures", "tower_slow.png", linear=False, wrap=False),
+            "cannon": load_sprite("tower_cannon", "assets", "textures", "tower_cannon.png", linear=False),
+            "slow": load_sprite("tower_slow", "assets", "textures", "tower_slow.png", linear=False),
         }
-        self.tower_elite_tex = load_tex("assets", "textures", "tower_elite.png", linear=False, wrap=False)
+        self.tower_elite_tex = load_sprite("tower_elite", "assets", "textures", "tower_elite.png", linear=False)
 
-        self.projectile_tex = load_tex("assets", "animations", "projectile.gif", wrap=False)
-        self.explosion_tex = load_tex("assets", "animations", "explosion.gif", wrap=False)
+        self.projectile_tex = load_sprite("projectile", "assets", "animations", "projectile.gif")
+        self.explosion_tex = load_sprite("explosion", "assets", "animations", "explosion.gif")
 
-        self.tower_colors = {"cannon": (1, 1, 1), "slow": (0.4, 0.6, 1)}
+        self.tower_colors = {"cannon": (1, 1, 1), "slow": (0.4, 0.6, 1), "splash": (1, 0.55, 0.2)}
         self.enemy_palettes = {
             "normal": {
                 "body": (0.1, 0.18, 0.12),
@@ -82,6 +120,12 @@ class GameWidget(Widget):
         self.explosions = []
         self.enemy_states = {}
         self.enemy_splats = []
+        self._shot_records = RecordPool(ShotEffect)
+        self._explosion_records = RecordPool(Explosion)
+        self._splat_records = RecordPool(Splat)
+        self._prev_positions = {}
+        # Switched off while fast-forwarding: no shots, splats or sounds
+        self.effects_enabled = True
 
         self._music = SoundLoader.load(resource_path("assets", "music", "loop.mp3"))
         if self._music:
@@ -92,6 +136,26 @@ class GameWidget(Widget):
         self.sfx_shoot = SoundLoader.load(resource_path("assets", "sfx", "shoot.wav"))
         self.sfx_death = SoundLoader.load(resource_path("assets", "sfx", "death.wav"))
 
+        # Retained render layers, drawn bottom to top
+        self._static_layer = InstructionGroup()
+        self._static_key = None
+        self._static_grid = None
+        layers = [self._static_layer] + [InstructionGroup() for _ in range(5)]
+        for layer in layers:
+            self.canvas.add(layer)
+        self._tower_pool = InstructionPool(layers[1], TowerSprite)
+        self._splat_pool = InstructionPool(layers[2], SplatSprite)
+        self._enemy_pool = InstructionPool(layers[3], EnemySprite)
+        self._shot_pool = InstructionPool(layers[4], lambda: BlastSprite(self.projectile_tex, 0.5))
+        self._blast_pool = InstructionPool(layers[5], lambda: BlastSprite(self.explosion_tex))
+
+        # With NumPy, enemies and effects are drawn as a few batched meshes instead
+        self.batched = BATCH_AVAILABLE
+        if self.batched:
+            self._enemy_batch = EnemyBatch(layers[3], self.enemy_palettes)
+            self._shot_batch = QuadBatch(layers[4], self.projectile_tex, 0.5)
+            self._blast_batch = QuadBatch(layers[5], self.explosion_tex)
+
     def on_size(self, *args):
         if self.world:
             self.world.viewport = (self.x, self.y, self.width, self.height)
@@ -123,141 +187,150 @@ class GameWidget(Widget):
             self.selected_tower = None
         return placed
 
-    def draw(self):
-        self.canvas.clear()
-        with self.canvas:
-            # Background artwork
-            if self.bg_tex:
-                Color(1, 1, 1, 1)
-                Rectangle(texture=self.bg_tex, pos=self.pos, size=self.size)
+    def _rebuild_static(self):
+        """Background and path tiles; only rebuilt when the layout changes."""
+        group = self._static_layer
+        group.clear()
+        if self.bg_tex:
+            group.add(Color(1, 1, 1, 1))
+            group.add(Rectangle(texture=self.bg_tex, pos=self.pos, size=self.size))
+        else:
+            group.add(Color(0.08, 0.1, 0.16, 1))
+            group.add(Rectangle(pos=self.pos, size=self.size))
+
+        # Path drawn as tiled pixel-art road
+        left, bottom, _, _ = self.world.viewport
+        tile = self.world.tile_size
+        inner_margin = tile * 0.18
+        edge_band = tile * 0.12
+        path_tiles = list(self.world.path_grid)
+        path_set = set(path_tiles)
+        for (gx, gy) in path_tiles:
+            px = left + gx * tile
+            py = bottom + gy * tile
+
+            group.add(Color(0.22, 0.18, 0.14, 1))
+            group.add(Rectangle(pos=(px, py), size=(tile, tile)))
+
+            inner_pos = (px + inner_margin, py + inner_margin)
+            inner_size = (tile - 2 * inner_margin, tile - 2 * inner_margin)
+            if self.path_tex:
+                group.add(Color(1, 1, 1, 0.94))
+                group.add(Rectangle(texture=self.path_tex, pos=inner_pos, size=inner_size))
             else:
-                Color(0.08, 0.1, 0.16, 1)
-                Rectangle(pos=self.pos, size=self.size)
-
-            # Path drawn as tiled pixel-art road
-            left, bottom, _, _ = self.world.viewport
-            tile = self.world.tile_size
-            inner_margin = tile * 0.18
-            edge_band = tile * 0.12
-            path_tiles = list(self.world.path_grid)
-            path_set = set(path_tiles)
-            for (gx, gy) in path_tiles:
-                px = left + gx * tile
-                py = bottom + gy * tile
-
-                Color(0.22, 0.18, 0.14, 1)
-                Rectangle(pos=(px, py), size=(tile, tile))
-
-                inner_pos = (px + inner_margin, py + inner_margin)
-                inner_size = (tile - 2 * inner_margin, tile - 2 * inner_margin)
-                if self.path_tex:
-                    Color(1, 1, 1, 0.94)
-                    Rectangle(texture=self.path_tex, pos=inner_pos, size=inner_size)
-                else:
-                    Color(0.7, 0.62, 0.54, 1)
-                    Rectangle(pos=inner_pos, size=inner_size)
-
-                Color(0.86, 0.8, 0.69, 0.7)
-                Ellipse(pos=(px + tile * 0.22, py + tile * 0.16), size=(tile * 0.56, tile * 0.6))
-
-                Color(0.14, 0.12, 0.09, 0.9)
-                Line(rectangle=(inner_pos[0], inner_pos[1], inner_size[0], inner_size[1]),
-                     width=max(1.2, tile * 0.05))
-
-                Color(0.16, 0.13, 0.1, 1)
-                if (gx, gy + 1) not in path_set:
-                    Rectangle(pos=(px, py + tile - edge_band), size=(tile, edge_band))
-                if (gx, gy - 1) not in path_set:
-                    Rectangle(pos=(px, py), size=(tile, edge_band))
-                if (gx - 1, gy) not in path_set:
-                    Rectangle(pos=(px, py), size=(edge_band, tile))
-                if (gx + 1, gy) not in path_set:
-                    Rectangle(pos=(px + tile - edge_band, py), size=(edge_band, tile))
-
-                Color(1, 1, 1, 1)
-
-            # Towers
-            for t in self.world.towers:
-                col = self.tower_colors.get(t.tower_type, (1, 1, 1))
-                base = self.world.tile_size * 0.9
-                scale = 1.0 + 0.06 * (t.level - 1) + 0.06 * math.sin(t.anim * 3)
-                height = base * scale
-                texture = self.tower_textures.get(t.tower_type)
-                Color(0, 0, 0, 0.22)
-                shadow_size = (self.world.tile_size * 0.82, self.world.tile_size * 0.4)
-                Ellipse(pos=(t.x - shadow_size[0]/2, t.y - shadow_size[1]/2 - 4), size=shadow_size)
-                if texture:
-                    aspect = texture.width / texture.height if texture.height else 1.0
-                    width = height * aspect
-                    Color(1, 1, 1, 1)
-                    Rectangle(texture=texture, pos=(t.x - width/2, t.y - height/2), size=(width, height))
-                else:
-                    width = height
-                    Color(*col, 1)
-                    Rectangle(pos=(t.x - width/2, t.y - height/2), size=(width, height))
-
-                if t.level >= 4 and self.tower_elite_tex:
-                    elite = self.tower_elite_tex
-                    elite_width = width * 1.05
-                    elite_height = height * 1.05
-                    Color(1, 1, 1, 0.65)
-                    Rectangle(texture=elite, pos=(t.x - elite_width/2, t.y - elite_height/2),
-                              size=(elite_width, elite_height))
-
-                if t.level > 1:
-                    Color(1.0, 0.84, 0.2, 0.28)
-                    ring = self.world.tile_size * (0.5 + 0.12 * (t.level - 1))
-                    Ellipse(pos=(t.x - ring, t.y - ring), size=(ring * 2, ring * 2))
-                if self.selected_tower is t:
-                    Color(0.55, 0.85, 1.0, 0.85)
-                    Rectangle(pos=(t.x - width/2 - 3, t.y - height/2 - 3), size=(width + 6, height + 6))
-                Color(1, 1, 1, 1)
-
-            # Fallen enemy residue
-            for splat in self.enemy_splats:
-                self._draw_enemy_splat(splat)
-
-            # Enemies with animation and health bar
-            for e in self.world.enemies:
-                palette = self.enemy_palettes.get(e.enemy_type, self.enemy_palettes["normal"])
-                state = self._ensure_enemy_state(e)
-                self._draw_insect_enemy(e, palette, state)
-                self._draw_enemy_healthbar(e)
-                Color(1, 1, 1, 1)
-
-            # Projectile trails
-            for effect in self.shot_effects:
-                alpha = max(0.0, 1.0 - effect["progress"])
-                Color(1, 1, 1, alpha)
-                pos = effect["pos"]
-                size = effect["size"]
-                if self.projectile_tex:
-                    Rectangle(texture=self.projectile_tex,
-                              pos=(pos[0] - size/2, pos[1] - size/2),
-                              size=(size, size))
-                else:
-                    Ellipse(pos=(pos[0] - size/4, pos[1] - size/4), size=(size/2, size/2))
-
-            # Explosions
-            for blast in self.explosions:
-                alpha = max(0.0, 1.0 - blast["progress"])
-                Color(1, 1, 1, alpha)
-                size = blast["size"] * (0.6 + 0.4 * blast["progress"])
-                if self.explosion_tex:
-                    Rectangle(texture=self.explosion_tex,
-                              pos=(blast["pos"][0] - size/2, blast["pos"][1] - size/2),
-                              size=(size, size))
-                else:
-                    Ellipse(pos=(blast["pos"][0] - size/2, blast["pos"][1] - size/2),
-                            size=(size, size))
+                group.add(Color(0.7, 0.62, 0.54, 1))
+                group.add(Rectangle(pos=inner_pos, size=inner_size))
+
+            group.add(Color(0.86, 0.8, 0.69, 0.7))
+            group.add(Ellipse(pos=(px + tile * 0.22, py + tile * 0.16), size=(tile * 0.56, tile * 0.6)))
+
+            group.add(Color(0.14, 0.12, 0.09, 0.9))
+            group.add(Line(rectangle=(inner_pos[0], inner_pos[1], inner_size[0], inner_size[1]),
+                           width=max(1.2, tile * 0.05)))
+
+            group.add(Color(0.16, 0.13, 0.1, 1))
+            if (gx, gy + 1) not in path_set:
+                group.add(Rectangle(pos=(px, py + tile - edge_band), size=(tile, edge_band)))
+            if (gx, gy - 1) not in path_set:
+                group.add(Rectangle(pos=(px, py), size=(tile, edge_band)))
+            if (gx - 1, gy) not in path_set:
+                group.add(Rectangle(pos=(px, py), size=(edge_band, tile)))
+            if (gx + 1, gy) not in path_set:
+                group.add(Rectangle(pos=(px + tile - edge_band, py), size=(edge_band, tile)))
+
+    def snapshot_positions(self):
+        """Remember enemy positions before the last sim step of a frame."""
+        self._prev_positions = {e.uid: (e.x, e.y) for e in self.world.enemies}
+
+    def interpolated_positions(self, alpha):
+        """Enemy positions ``alpha`` of the way from the snapshot to now."""
+        prev = self._prev_positions
+        positions = []
+        for e in self.world.enemies:
+            entry = prev.get(e.uid)
+            if entry is None or alpha >= 1.0:
+                positions.append((e.x, e.y))
+            else:
+                px, py = entry
+                positions.append((px + (e.x - px) * alpha, py + (e.y - py) * alpha))
+        return positions
+
+    def draw(self, alpha=1.0):
+        world = self.world
+        tile = world.tile_size
+        static_key = (tuple(self.pos), tuple(self.size), tuple(world.viewport), tile)
+        if static_key != self._static_key or world.path_grid is not self._static_grid:
+            self._static_key = static_key
+            self._static_grid = world.path_grid
+            self._rebuild_static()
+
+        # Towers: rebound on place/fuse/selection, otherwise only animated
+        pool = self._tower_pool
+        pool.begin()
+        for t in world.towers:
+            sprite = pool.take()
+            selected = self.selected_tower is t
+            if sprite.tower is not t or sprite.selected != selected:
+                sprite.bind(t, self.tower_textures.get(t.tower_type),
+                            self.tower_colors.get(t.tower_type, (1, 1, 1)),
+                            self.tower_elite_tex, tile, selected)
+            sprite.animate(t, tile)
+        pool.end()
+
+        # Fallen enemy residue
+        pool = self._splat_pool
+        pool.begin()
+        for splat in self.enemy_splats:
+            pool.take().update(splat, tile * 0.5)
+        pool.end()
+
+        positions = self.interpolated_positions(alpha)
+        if self.batched:
+            self._draw_batched(world, positions, tile)
+            return
+
+        # Enemies with animation and health bar
+        pool = self._enemy_pool
+        pool.begin()
+        for e, (x, y) in zip(world.enemies, positions):
+            palette = self.enemy_palettes.get(e.enemy_type, self.enemy_palettes["normal"])
+            state = self._ensure_enemy_state(e)
+            pool.take().update(e, x, y, palette, state, tile)
+        pool.end()
+
+        # Projectile trails
+        pool = self._shot_pool
+        pool.begin()
+        for effect in self.shot_effects:
+            pool.take().update(effect.pos, effect.size, max(0.0, 1.0 - effect.progress))
+        pool.end()
+
+        # Explosions
+        pool = self._blast_pool
+        pool.begin()
+        for blast in self.explosions:
+            size = blast.size * (0.6 + 0.4 * blast.progress)
+            pool.take().update(blast.pos, size, max(0.0, 1.0 - blast.progress))
+        pool.end()
+
+    def _draw_batched(self, world, positions, tile):
+        enemies = world.enemies
+        self._enemy_batch.update(enemies, [self._ensure_enemy_state(e) for e in enemies],
+                                 positions, tile)
+        self._shot_batch.update([(fx.pos[0], fx.pos[1], fx.size, 1.0 - fx.progress)
+                                 for fx in self.shot_effects])
+        self._blast_batch.update([(b.pos[0], b.pos[1], b.size * (0.6 + 0.4 * b.progress),
+                                   1.0 - b.progress)
+                                  for b in self.explosions])
 
     def _ensure_enemy_state(self, enemy):
-        key = id(enemy)
+        key = enemy.uid
         state = self.enemy_states.get(key)
         if state is None:
+            rng = self.world.fx_rng
             state = {
-                "phase": random.random() * math.tau,
-                "wing": random.random() * math.tau,
+                "phase": rng.random() * math.tau,
+                "wing": rng.random() * math.tau,
                 "dir": (1.0, 0.0),
                 "pos": (enemy.x, enemy.y),
                 "bob": 0.0,
@@ -266,144 +339,27 @@ class GameWidget(Widget):
             self.enemy_states[key] = state
         return state
 
-    def _draw_enemy_splat(self, splat):
-        radius = splat.get("radius", self.world.tile_size * 0.5)
-        progress = splat.get("progress", 0.0)
-        alpha = max(0.0, 1.0 - progress)
-        base_color = splat.get("color", (0.6, 0.2, 0.2))
-        Color(base_color[0], base_color[1], base_color[2], 0.45 * alpha)
-        Ellipse(pos=(splat["pos"][0] - radius, splat["pos"][1] - radius), size=(radius * 2, radius * 1.65))
-        Color(base_color[0] * 0.6, base_color[1] * 0.6, base_color[2] * 0.6, 0.4 * alpha)
-        Ellipse(pos=(splat["pos"][0] - radius * 0.7, splat["pos"][1] - radius * 0.55),
-                size=(radius * 1.4, radius * 1.1))
-        drops = splat.get("drops", [])
-        for dx, dy, size in drops:
-            Color(base_color[0], base_color[1], base_color[2], 0.32 * alpha)
-            Ellipse(pos=(dx - size/2, dy - size/2), size=(size, size))
-
-    def _draw_enemy_healthbar(self, enemy):
-        hp_frac = max(0.0, enemy.hp / enemy.max_hp)
-        bar_width = self.world.tile_size * 0.92
-        Color(0.08, 0.03, 0.01, 1)
-        Rectangle(pos=(enemy.x - bar_width/2, enemy.y + self.world.tile_size * 0.6), size=(bar_width, 6))
-        Color(0.82, 0.16, 0.26, 1)
-        Rectangle(pos=(enemy.x - bar_width/2, enemy.y + self.world.tile_size * 0.6), size=(bar_width * hp_frac, 6))
-
-    def _draw_insect_enemy(self, enemy, palette, state):
-        tile = self.world.tile_size
-        body_color = palette.get("body", (0.14, 0.1, 0.07))
-        accent_color = palette.get("accent", (0.7, 0.9, 0.6))
-        wing_color = palette.get("wing", (0.9, 0.95, 1.0, 0.4))
-        if len(wing_color) == 3:
-            wing_color = (wing_color[0], wing_color[1], wing_color[2], 0.4)
-        scale = tile * (1.05 if enemy.enemy_type == "normal" else 0.95)
-        body_len = scale * 1.05
-        body_width = scale * 0.55
-        head_size = scale * 0.35
-        abdomen_len = scale * 0.7
-        leg_phase = state.get("phase", 0.0)
-        wing_phase = state.get("wing", 0.0)
-        bob = state.get("bob", 0.0)
-        flash = state.get("flash", 0.0)
-
-        Color(0, 0, 0, 0.25)
-        shadow_size = (tile * 0.82, tile * 0.34)
-        Ellipse(pos=(enemy.x - shadow_size[0]/2, enemy.y - shadow_size[1]/2 - 4), size=shadow_size)
-
-        dirx, diry = state.get("dir", (1.0, 0.0))
-        angle = math.degrees(math.atan2(diry, dirx))
-
-        PushMatrix()
-        Rotate(angle=angle, origin=(enemy.x, enemy.y))
-
-        Color(body_color[0], body_color[1], body_color[2], 1)
-        Ellipse(pos=(enemy.x - body_len * 0.65, enemy.y - body_width/2 + bob), size=(body_len, body_width))
-
-        Color(min(1.0, body_color[0] * 1.1),
-              min(1.0, body_color[1] * 1.1),
-              min(1.0, body_color[2] * 1.1), 0.95)
-        Ellipse(pos=(enemy.x - abdomen_len * 0.95, enemy.y - body_width * 0.48 + bob),
-                size=(abdomen_len, body_width * 0.92))
-
-        Color(min(1.0, accent_color[0]),
-              min(1.0, accent_color[1]),
-              min(1.0, accent_color[2]), 0.85)
-        Ellipse(pos=(enemy.x - body_len * 0.25, enemy.y - body_width * 0.38 + bob),
-                size=(body_len * 0.5, body_width * 0.76))
-
-        Color(accent_color[0] * 0.9, accent_color[1] * 0.9, accent_color[2] * 0.9, 0.9)
-        Ellipse(pos=(enemy.x + scale * 0.32 - head_size/2, enemy.y - head_size/2 + bob), size=(head_size, head_size))
-
-        wing_span = scale * 0.85
-        wing_height = scale * 0.55 + math.sin(wing_phase) * scale * 0.08
-        Color(*wing_color)
-        Ellipse(pos=(enemy.x - scale * 0.15 - wing_span/2, enemy.y + body_width * 0.1 + bob),
-                size=(wing_span, wing_height))
-        Ellipse(pos=(enemy.x - scale * 0.15 - wing_span/2, enemy.y - body_width * 0.1 - wing_height + bob),
-                size=(wing_span, wing_height))
-
-        leg_offsets = [-scale * 0.3, -scale * 0.05, scale * 0.22]
-        leg_length = scale * 0.6
-        Color(body_color[0] * 0.6, body_color[1] * 0.6, body_color[2] * 0.6, 1)
-        for i, anchor_x in enumerate(leg_offsets):
-            stride = math.sin(leg_phase + i * 1.2)
-            foot_y = body_width * 0.6 + stride * (body_width * 0.35)
-            Line(points=[enemy.x + anchor_x, enemy.y + bob,
-                         enemy.x + anchor_x - leg_length * 0.3, enemy.y + foot_y + bob,
-                         enemy.x + anchor_x - leg_length * 0.6, enemy.y + foot_y * 0.8 + bob],
-                 width=1.6, cap='round')
-            Line(points=[enemy.x + anchor_x, enemy.y + bob,
-                         enemy.x + anchor_x - leg_length * 0.3, enemy.y - foot_y + bob,
-                         enemy.x + anchor_x - leg_length * 0.6, enemy.y - foot_y * 0.8 + bob],
-                 width=1.6, cap='round')
-
-        if flash > 0.0:
-            intensity = min(1.0, flash / 0.28)
-            Color(1.0, 0.4, 0.2, 0.35 * intensity)
-            Ellipse(pos=(enemy.x - body_len * 0.55, enemy.y - body_width * 0.5 + bob),
-                    size=(body_len * 0.85, body_width * 0.95))
-
-        PopMatrix()
+    def set_effects_enabled(self, enabled):
+        self.effects_enabled = enabled
+        if not enabled:
+            release_all(self.shot_effects, self._shot_records)
+            release_all(self.explosions, self._explosion_records)
+            release_all(self.enemy_splats, self._splat_records)
 
     def update_effects(self, dt):
-        for splat in list(self.enemy_splats):
-            splat["time"] += dt
-            if splat["time"] >= splat["duration"]:
-                self.enemy_splats.remove(splat)
-            else:
-                splat["progress"] = splat["time"] / splat["duration"]
-
-        for effect in list(self.shot_effects):
-            effect["time"] += dt
-            effect["progress"] = effect["time"] / effect["duration"]
-            if effect["progress"] >= 1.0:
-                self.shot_effects.remove(effect)
-                continue
-            sx, sy = effect["start"]
-            tx, ty = effect["end"]
-            frac = effect["progress"]
-            effect["pos"] = (sx + (tx - sx) * frac, sy + (ty - sy) * frac)
-
-        for blast in list(self.explosions):
-            blast["time"] += dt
-            blast["progress"] = blast["time"] / blast["duration"]
-            if blast["progress"] >= 1.0:
-                self.explosions.remove(blast)
-
-        active_ids = set()
+        age_records(self.enemy_splats, self._splat_records, dt)
+        age_records(self.explosions, self._explosion_records, dt)
+        age_records(self.shot_effects, self._shot_records, dt)
+        for effect in self.shot_effects:
+            sx, sy = effect.start
+            tx, ty = effect.end
+            frac = effect.progress
+            effect.pos = (sx + (tx - sx) * frac, sy + (ty - sy) * frac)
+
+        active = set()
         for enemy in self.world.enemies:
-            key = id(enemy)
-            active_ids.add(key)
-            state = self.enemy_states.get(key)
-            if state is None:
-                state = {
-                    "phase": random.random() * math.tau,
-                    "wing": random.random() * math.tau,
-                    "dir": (1.0, 0.0),
-                    "pos": (enemy.x, enemy.y),
-                    "bob": 0.0,
-                }
-                self.enemy_states[key] = state
+            active.add(enemy.uid)
+            state = self._ensure_enemy_state(enemy)
             prev_x, prev_y = state["pos"]
             dx = enemy.x - prev_x
             dy = enemy.y - prev_y
@@ -419,50 +375,56 @@ class GameWidget(Widget):
             state["bob"] = math.sin(state["phase"]) * self.world.tile_size * 0.06
             state["pos"] = (enemy.x, enemy.y)
             state["flash"] = enemy.hit_flash
-        for key in list(self.enemy_states.keys()):
-            if key not in active_ids:
-                self.enemy_states.pop(key, None)
+        if len(self.enemy_states) > len(active):
+            for key in [k for k in self.enemy_states if k not in active]:
+                del self.enemy_states[key]
 
     def play_shoot(self, tower, enemy):
+        if not self.effects_enabled:
+            return
         if self.sfx_shoot:
             self.sfx_shoot.stop()
             self.sfx_shoot.play()
-        start = (tower.x, tower.y)
-        target_pos = (enemy.x, enemy.y)
-        self.shot_effects.append({
-            "start": start,
-            "end": target_pos,
-            "pos": start,
-            "time": 0.0,
-            "duration": 0.25,
-            "progress": 0.0,
-            "size": self.world.tile_size * 0.45,
-        })
+        effect = self._shot_records.acquire(0.25)
+        effect.start = (tower.x, tower.y)
+        effect.end = (enemy.x, enemy.y)
+        effect.pos = effect.start
+        effect.size = self.world.tile_size * 0.45
+        self.shot_effects.append(effect)
+        if tower.splash > 0.0:
+            blast = self._explosion_records.acquire(0.35)
+            blast.pos = effect.end
+            blast.size = tower.splash * 2
+            self.explosions.append(blast)
 
     def play_death(self, enemy):
+        if not self.effects_enabled:
+            return
         if self.sfx_death:
             self.sfx_death.stop()
             self.sfx_death.play()
         palette = self.enemy_palettes.get(enemy.enemy_type, self.enemy_palettes["normal"])
-        rng = random.Random()
+        rng = self.world.fx_rng
         radius = self.world.tile_size * (0.52 if enemy.enemy_type == "normal" else 0.45)
-        drops = []
-        for _ in range(6):
+        splat = self._splat_records.acquire(0.6)
+        splat.pos = (enemy.x, enemy.y)
+        splat.radius = radius
+        splat.color = palette.get("accent", (0.8, 0.3, 0.2))
+        for drop in splat.drops:
             ang = rng.random() * math.tau
             dist = rng.uniform(radius * 0.3, radius * 1.1)
-            size = rng.uniform(radius * 0.12, radius * 0.24)
-            drops.append((enemy.x + math.cos(ang) * dist,
-                          enemy.y + math.sin(ang) * dist,
-                          size))
-        self.enemy_splats.append({
-            "pos": (enemy.x, enemy.y),
-            "time": 0.0,
-            "duration": 0.6,
-            "progress": 0.0,
-            "radius": radius,
-            "color": palette.get("accent", (0.8, 0.3, 0.2)),
-            "drops": drops,
-        })
+            drop[0] = enemy.x + math.cos(ang) * dist
+            drop[1] = enemy.y + math.sin(ang) * dist
+            drop[2] = rng.uniform(radius * 0.12, radius * 0.24)
+        self.enemy_splats.append(splat)
+
+
+# Fast-forward settings cycled by the HUD button; 0 runs as fast as possible
+SPEEDS = (1, 2, 4, 0)
+# Wall time per frame spent simulating at maximum speed
+MAX_SPEED_BUDGET = 0.012
+# Toggles the profiler overlay
+PROFILE_KEY = 284  # F3
 
 
 class GameScreen(Screen):
@@ -472,27 +434,160 @@ class GameScreen(Screen):
     status = StringProperty("")
     next_wave_in = NumericProperty(0.0)
     game_widget = ObjectProperty(None)
+    # Simulation rate, independent of the frame rate; lower it on weak hardware
+    sim_hz = NumericProperty(60.0)
+    # Steps run at most per frame before the game falls behind real time
+    max_catchup_steps = NumericProperty(5)
+    speed = NumericProperty(1)
+    # Achieved simulation speed relative to real time, refreshed twice a second
+    sim_speed = NumericProperty(1.0)
+    # Phase timings (F3): overlay text, and where to dump every frame when
+    # profiling is switched off again (.csv or .json)
+    profiling = BooleanProperty(False)
+    profile_text = StringProperty("")
+    profile_out = StringProperty(os.environ.get("TD_PROFILE_OUT", ""))
+    # Records every game's inputs to this file (see td.replay)
+    replay_out = StringProperty(os.environ.get("TD_REPLAY_OUT", ""))
 
     def on_enter(self, *args):
         if not hasattr(self, "world") or self.world is None:
             self.world = World(viewport=(0, 0, self.width * 0.75, self.height), shoot_cb=self.on_tower_shoot, death_cb=self.on_enemy_death)
         self.ids.game.world = self.world
-        self._clock = Clock.schedule_interval(self._update, 1/60.0)
+        self._timestep = FixedTimestep(self.sim_hz, self.max_catchup_steps * max(1, self.speed))
+        self._speed_wall = 0.0
+        self._speed_sim = 0.0
+        self._profile_wall = 0.0
+        self.world.profiler.enabled = self.profiling
+        self._start_recording()
+        Window.bind(on_key_down=self._on_key_down)
+        self._clock = Clock.schedule_interval(self._update, 0)
+
+    def on_sim_hz(self, *args):
+        if getattr(self, "_timestep", None):
+            self._timestep.set_rate(self.sim_hz)
+
+    def on_max_catchup_steps(self, *args):
+        if getattr(self, "_timestep", None):
+            self._timestep.max_steps = self.max_catchup_steps * max(1, self.speed)
+
+    def cycle_speed(self):
+        i = SPEEDS.index(self.speed) if self.speed in SPEEDS else 0
+        self.speed = SPEEDS[(i + 1) % len(SPEEDS)]
+
+    def on_speed(self, *args):
+        self.ids.game.set_effects_enabled(self.speed == 1)
+        if getattr(self, "_timestep", None):
+            self._timestep.reset()
+            self.on_max_catchup_steps()
 
     def on_pre_leave(self, *args):
+        Window.unbind(on_key_down=self._on_key_down)
+        self._save_replay()
         if hasattr(self, "_clock") and self._clock:
             self._clock.cancel()
 
+    def _on_key_down(self, window, key, *args):
+        if key == PROFILE_KEY:
+            self.profiling = not self.profiling
+            return True
+        return False
+
+    def on_profiling(self, *args):
+        world = getattr(self, "world", None)
+        if world is None:
+            return
+        prof = world.profiler
+        if self.profiling:
+            prof.reset()
+            prof.record = bool(self.profile_out)
+            prof.enabled = True
+            return
+        prof.enabled = False
+        self.profile_text = ""
+        if prof.record and prof.history:
+            try:
+                prof.dump(self.profile_out)
+                Logger.info("Profiler: wrote %d frames to %s", prof.frames, self.profile_out)
+            except OSError as exc:
+                Logger.warning("Profiler: could not write %s: %s", self.profile_out, exc)
+        prof.reset()
+
+    def _start_recording(self):
+        if self.replay_out and self.world.recording is None and self.world.tick == 0:
+            Recorder(self.world, self._timestep.step)
+
+    def _save_replay(self):
+        world = self.world
+        if world.recording is None:
+            return
+        try:
+            world.recording.finish(world).save(self.replay_out)
+            Logger.info("Replay: wrote %d ticks to %s", world.tick, self.replay_out)
+        except OSError as exc:
+            Logger.warning("Replay: could not write %s: %s", self.replay_out, exc)
+
     def _update(self, dt):
-        update_world(self.world, dt)
-        if not self.world.paused and self.world.lives > 0:
-            self.ids.game.update_effects(dt)
+        prof = self.world.profiler
+        with prof.phase("frame"):
+            self._frame(dt, prof)
+        prof.end_frame()
+        if self.world.lives <= 0 and self.world.recording is not None:
+            self._save_replay()  # game over: the replay is complete
+            self.world.recording = None
+        if prof.enabled:
+            self._profile_wall += dt
+            if self._profile_wall >= 0.5:
+                self._profile_wall = 0.0
+                self.profile_text = f"{1.0 / dt if dt > 0 else 0.0:5.1f} fps\n" + prof.summary()
+
+    def _frame(self, dt, prof):
+        game = self.ids.game
+        world = self.world
+        timestep = self._timestep
+        running = not world.paused and world.lives > 0
+        with prof.phase("sim"):
+            if self.speed > 0:
+                steps = timestep.advance(dt * self.speed)
+                for i in range(steps):
+                    if i == steps - 1:
+                        game.snapshot_positions()
+                    update_world(world, timestep.step)
+                alpha = timestep.alpha
+            else:
+                steps = self._run_flat_out()
+                alpha = 1.0
+        self._measure_speed(dt, steps * timestep.step if running else 0.0)
+        if not world.paused and world.lives > 0:
+            with prof.phase("effects"):
+                game.update_effects(dt)
         self.gold = self.world.gold
         self.lives = self.world.lives
         self.wave = self.world.wave_number
         self.status = self.world.status_text
         self.next_wave_in = max(0.0, self.world.time_to_next_wave)
-        self.ids.game.draw()
+        with prof.phase("draw"):
+            game.draw(alpha)
+
+    def _run_flat_out(self):
+        """Step the world until this frame's time budget is used up."""
+        world = self.world
+        step = self._timestep.step
+        deadline = time.perf_counter() + MAX_SPEED_BUDGET
+        steps = 0
+        while not world.paused and world.lives > 0:
+            update_world(world, step)
+            steps += 1
+            if time.perf_counter() >= deadline:
+                break
+        return steps
+
+    def _measure_speed(self, wall, sim):
+        self._speed_wall += wall
+        self._speed_sim += sim
+        if self._speed_wall >= 0.5:
+            self.sim_speed = self._speed_sim / self._speed_wall
+            self._speed_wall = 0.0
+            self._speed_sim = 0.0
 
     def on_tower_shoot(self, tower, enemy):
         self.ids.game.play_shoot(tower, enemy)
@@ -500,13 +595,23 @@ class GameScreen(Screen):
     def on_enemy_death(self, enemy):
         self.ids.game.play_death(enemy)
 
+    def cycle_targeting(self):
+        tower = self.ids.game.selected_tower
+        if tower is None:
+            self.world.status_text = "Erst einen Tower wählen."
+            return
+        self.world.cycle_targeting(tower)
+
     def pause(self):
-        self.world.paused = True
+        self.world.set_paused(True)
         self.status = "Pausiert"
 
     def resume(self):
-        self.world.paused = False
+        self.world.set_paused(False)
         self.status = ""
 
     def restart(self):
+        self._save_replay()
+        self._timestep.reset()
         self.world.reset()
+        self._start_recording()
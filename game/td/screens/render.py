@@ -0,0 +1,285 @@
+"""Retained-mode sprite records for :class:`~td.screens.game.GameWidget`.
+
+Every sprite owns a small :class:`InstructionGroup` built once; per frame
+only the positions, sizes and colours of its instructions are mutated.
+:class:`InstructionPool` hands sprites out and parks the unused ones, so a
+frame allocates no Kivy instructions once the pools are warm.
+"""
+
+import math
+
+from kivy.graphics import (Color, Ellipse, InstructionGroup, Line, PopMatrix, PushMatrix,
+                           Rectangle, Rotate)
+
+from td.core.damage import HIT_FLASH
+
+
+class InstructionPool:
+    """Recycles sprites drawn into one parent group.
+
+    Call :meth:`begin`, then :meth:`take` once per visible item, then
+    :meth:`end`; sprites that were not taken this frame are detached from
+    the parent but kept for later frames.
+    """
+
+    def __init__(self, parent, factory):
+        self.parent = parent
+        self.factory = factory
+        self.items = []
+        self._shown = 0
+        self._used = 0
+
+    def begin(self):
+        self._used = 0
+
+    def take(self):
+        i = self._used
+        if i == len(self.items):
+            self.items.append(self.factory())
+        item = self.items[i]
+        if i >= self._shown:
+            self.parent.add(item.group)
+        self._used += 1
+        return item
+
+    def end(self):
+        for item in self.items[self._used:self._shown]:
+            self.parent.remove(item.group)
+        self._shown = self._used
+
+
+class TowerSprite:
+    def __init__(self):
+        self.tower = None
+        self.selected = False
+        self.aspect = 1.0
+        g = self.group = InstructionGroup()
+        g.add(Color(0, 0, 0, 0.22))
+        self.shadow = Ellipse()
+        g.add(self.shadow)
+        self.body_color = Color(1, 1, 1, 1)
+        self.body = Rectangle()
+        g.add(self.body_color)
+        g.add(self.body)
+        self.elite_color = Color(1, 1, 1, 0)
+        self.elite = Rectangle()
+        g.add(self.elite_color)
+        g.add(self.elite)
+        self.ring_color = Color(1.0, 0.84, 0.2, 0)
+        self.ring = Ellipse()
+        g.add(self.ring_color)
+        g.add(self.ring)
+        self.select_color = Color(0.55, 0.85, 1.0, 0)
+        self.select = Rectangle()
+        g.add(self.select_color)
+        g.add(self.select)
+
+    def bind(self, tower, texture, color, elite_tex, tile, selected):
+        """Static look of a tower; only needed after place/fuse/selection."""
+        self.tower = tower
+        self.selected = selected
+        self.body.texture = texture
+        self.body_color.rgba = (1, 1, 1, 1) if texture else (color[0], color[1], color[2], 1)
+        self.aspect = texture.width / texture.height if texture and texture.height else 1.0
+        shadow_w, shadow_h = tile * 0.82, tile * 0.4
+        self.shadow.pos = (tower.x - shadow_w / 2, tower.y - shadow_h / 2 - 4)
+        self.shadow.size = (shadow_w, shadow_h)
+        show_elite = tower.level >= 4 and elite_tex is not None
+        self.elite.texture = elite_tex if show_elite else None
+        self.elite_color.a = 0.65 if show_elite else 0.0
+        if tower.level > 1:
+            ring = tile * (0.5 + 0.12 * (tower.level - 1))
+            self.ring.pos = (tower.x - ring, tower.y - ring)
+            self.ring.size = (ring * 2, ring * 2)
+            self.ring_color.a = 0.28
+        else:
+            self.ring_color.a = 0.0
+        self.select_color.a = 0.85 if selected else 0.0
+
+    def animate(self, tower, tile):
+        height = tile * 0.9 * (1.0 + 0.06 * (tower.level - 1) + 0.06 * math.sin(tower.anim * 3))
+        width = height * self.aspect
+        x, y = tower.x, tower.y
+        self.body.pos = (x - width / 2, y - height / 2)
+        self.body.size = (width, height)
+        if self.elite_color.a:
+            self.elite.pos = (x - width * 0.525, y - height * 0.525)
+            self.elite.size = (width * 1.05, height * 1.05)
+        if self.selected:
+            self.select.pos = (x - width / 2 - 3, y - height / 2 - 3)
+            self.select.size = (width + 6, height + 6)
+
+
+class EnemySprite:
+    """Insect body, wings, legs, hit flash and health bar of one enemy."""
+
+    def __init__(self):
+        self.kind = None
+        g = self.group = InstructionGroup()
+        g.add(Color(0, 0, 0, 0.25))
+        self.shadow = Ellipse()
+        g.add(self.shadow)
+        g.add(PushMatrix())
+        self.rotate = Rotate()
+        g.add(self.rotate)
+        self.body_color = Color()
+        self.body = Ellipse()
+        self.abdomen_color = Color()
+        self.abdomen = Ellipse()
+        self.accent_color = Color()
+        self.accent = Ellipse()
+        self.head_color = Color()
+        self.head = Ellipse()
+        self.wing_color = Color()
+        self.wings = (Ellipse(), Ellipse())
+        self.leg_color = Color()
+        self.legs = tuple(Line(width=1.6, cap="round") for _ in range(6))
+        self.flash_color = Color(1.0, 0.4, 0.2, 0)
+        self.flash = Ellipse()
+        for instruction in (self.body_color, self.body, self.abdomen_color, self.abdomen,
+                            self.accent_color, self.accent, self.head_color, self.head,
+                            self.wing_color, *self.wings, self.leg_color, *self.legs,
+                            self.flash_color, self.flash):
+            g.add(instruction)
+        g.add(PopMatrix())
+        g.add(Color(0.08, 0.03, 0.01, 1))
+        self.bar_bg = Rectangle()
+        g.add(self.bar_bg)
+        g.add(Color(0.82, 0.16, 0.26, 1))
+        self.bar = Rectangle()
+        g.add(self.bar)
+
+    def _bind_palette(self, kind, palette):
+        self.kind = kind
+        body = palette.get("body", (0.14, 0.1, 0.07))
+        accent = palette.get("accent", (0.7, 0.9, 0.6))
+        wing = palette.get("wing", (0.9, 0.95, 1.0, 0.4))
+        if len(wing) == 3:
+            wing = (wing[0], wing[1], wing[2], 0.4)
+        self.body_color.rgba = (body[0], body[1], body[2], 1)
+        self.abdomen_color.rgba = (min(1.0, body[0] * 1.1), min(1.0, body[1] * 1.1),
+                                   min(1.0, body[2] * 1.1), 0.95)
+        self.accent_color.rgba = (min(1.0, accent[0]), min(1.0, accent[1]), min(1.0, accent[2]), 0.85)
+        self.head_color.rgba = (accent[0] * 0.9, accent[1] * 0.9, accent[2] * 0.9, 0.9)
+        self.wing_color.rgba = wing
+        self.leg_color.rgba = (body[0] * 0.6, body[1] * 0.6, body[2] * 0.6, 1)
+
+    def update(self, enemy, x, y, palette, state, tile):
+        if self.kind != enemy.enemy_type:
+            self._bind_palette(enemy.enemy_type, palette)
+        scale = tile * (1.05 if enemy.enemy_type == "normal" else 0.95)
+        body_len = scale * 1.05
+        body_width = scale * 0.55
+        head_size = scale * 0.35
+        abdomen_len = scale * 0.7
+        bob = state.get("bob", 0.0)
+        flash = state.get("flash", 0.0)
+
+        shadow_w, shadow_h = tile * 0.82, tile * 0.34
+        self.shadow.pos = (x - shadow_w / 2, y - shadow_h / 2 - 4)
+        self.shadow.size = (shadow_w, shadow_h)
+
+        dirx, diry = state.get("dir", (1.0, 0.0))
+        self.rotate.angle = math.degrees(math.atan2(diry, dirx))
+        self.rotate.origin = (x, y)
+
+        self.body.pos = (x - body_len * 0.65, y - body_width / 2 + bob)
+        self.body.size = (body_len, body_width)
+        self.abdomen.pos = (x - abdomen_len * 0.95, y - body_width * 0.48 + bob)
+        self.abdomen.size = (abdomen_len, body_width * 0.92)
+        self.accent.pos = (x - body_len * 0.25, y - body_width * 0.38 + bob)
+        self.accent.size = (body_len * 0.5, body_width * 0.76)
+        self.head.pos = (x + scale * 0.32 - head_size / 2, y - head_size / 2 + bob)
+        self.head.size = (head_size, head_size)
+
+        wing_span = scale * 0.85
+        wing_height = scale * 0.55 + math.sin(state.get("wing", 0.0)) * scale * 0.08
+        upper, lower = self.wings
+        upper.pos = (x - scale * 0.15 - wing_span / 2, y + body_width * 0.1 + bob)
+        upper.size = (wing_span, wing_height)
+        lower.pos = (x - scale * 0.15 - wing_span / 2, y - body_width * 0.1 - wing_height + bob)
+        lower.size = (wing_span, wing_height)
+
+        leg_phase = state.get("phase", 0.0)
+        leg_length = scale * 0.6
+        legs = self.legs
+        for i, anchor in enumerate((-scale * 0.3, -scale * 0.05, scale * 0.22)):
+            stride = math.sin(leg_phase + i * 1.2)
+            foot_y = body_width * 0.6 + stride * (body_width * 0.35)
+            ax = x + anchor
+            legs[2 * i].points = [ax, y + bob,
+                                  ax - leg_length * 0.3, y + foot_y + bob,
+                                  ax - leg_length * 0.6, y + foot_y * 0.8 + bob]
+            legs[2 * i + 1].points = [ax, y + bob,
+                                      ax - leg_length * 0.3, y - foot_y + bob,
+                                      ax - leg_length * 0.6, y - foot_y * 0.8 + bob]
+
+        if flash > 0.0:
+            self.flash_color.a = 0.35 * min(1.0, flash / HIT_FLASH)
+            self.flash.pos = (x - body_len * 0.55, y - body_width * 0.5 + bob)
+            self.flash.size = (body_len * 0.85, body_width * 0.95)
+        elif self.flash_color.a:
+            self.flash_color.a = 0.0
+
+        hp_frac = max(0.0, enemy.hp / enemy.max_hp)
+        bar_width = tile * 0.92
+        bar_pos = (x - bar_width / 2, y + tile * 0.6)
+        self.bar_bg.pos = bar_pos
+        self.bar_bg.size = (bar_width, 6)
+        self.bar.pos = bar_pos
+        self.bar.size = (bar_width * hp_frac, 6)
+
+
+class SplatSprite:
+    def __init__(self, drops=6):
+        g = self.group = InstructionGroup()
+        self.outer_color = Color()
+        self.outer = Ellipse()
+        self.inner_color = Color()
+        self.inner = Ellipse()
+        self.drop_color = Color()
+        self.drops = tuple(Ellipse() for _ in range(drops))
+        for instruction in (self.outer_color, self.outer, self.inner_color, self.inner,
+                            self.drop_color, *self.drops):
+            g.add(instruction)
+
+    def update(self, splat, default_radius):
+        radius = splat.radius or default_radius
+        alpha = max(0.0, 1.0 - splat.progress)
+        r, g, b = splat.color
+        px, py = splat.pos
+        self.outer_color.rgba = (r, g, b, 0.45 * alpha)
+        self.outer.pos = (px - radius, py - radius)
+        self.outer.size = (radius * 2, radius * 1.65)
+        self.inner_color.rgba = (r * 0.6, g * 0.6, b * 0.6, 0.4 * alpha)
+        self.inner.pos = (px - radius * 0.7, py - radius * 0.55)
+        self.inner.size = (radius * 1.4, radius * 1.1)
+        self.drop_color.rgba = (r, g, b, 0.32 * alpha)
+        drops = splat.drops
+        for i, ellipse in enumerate(self.drops):
+            if i < len(drops):
+                dx, dy, size = drops[i]
+                ellipse.pos = (dx - size / 2, dy - size / 2)
+                ellipse.size = (size, size)
+            else:
+                ellipse.size = (0, 0)
+
+
+class BlastSprite:
+    """Textured quad (or plain ellipse) used for projectiles and explosions."""
+
+    def __init__(self, texture=None, fallback_scale=1.0):
+        self.fallback_scale = fallback_scale
+        g = self.group = InstructionGroup()
+        self.color = Color(1, 1, 1, 1)
+        self.shape = Rectangle(texture=texture) if texture else Ellipse()
+        self.textured = texture is not None
+        g.add(self.color)
+        g.add(self.shape)
+
+    def update(self, pos, size, alpha):
+        if not self.textured:
+            size *= self.fallback_scale
+        self.color.a = alpha
+        self.shape.pos = (pos[0] - size / 2, pos[1] - size / 2)
+        self.shape.size = (size, size)
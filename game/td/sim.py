@@ -0,0 +1,210 @@
+"""Headless simulation runner for throughput measurements.
+
+Builds a :class:`~td.core.world.World` without Kivy, places towers from a
+simple script as soon as gold allows and steps the core loop at a fixed
+timestep as fast as possible::
+
+    python -m td.sim --waves 10 --towers 30 --build cannon cannon slow
+
+The report lists ticks/sec, time spent per phase of the update loop and
+peak entity counts; ``--json`` prints the same data machine-readable so
+runs can be compared over time, and ``--profile-out FILE`` dumps the
+time of every phase per tick (CSV, or JSON with percentiles).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from td.core.map_cache import MapCache
+from td.core.profiling import Profiler
+from td.core.systems import update_world
+from td.core.targeting import TARGETING_MODES
+from td.core.world import World
+
+DEFAULT_VIEWPORT = (0, 0, 960, 720)
+PHASES: Tuple[str, ...] = ("spawning", "targeting", "movement", "removal", "status")
+
+
+@dataclass
+class SimReport:
+    seed: int = 0
+    ticks: int = 0
+    sim_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    waves: int = 0
+    lives: int = 0
+    gold: int = 0
+    towers: int = 0
+    peak_enemies: int = 0
+    phase_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        return self.sim_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["ticks_per_second"] = self.ticks_per_second
+        data["realtime_factor"] = self.realtime_factor
+        return data
+
+
+def build_sites(world: World) -> List[Tuple[int, int]]:
+    """Free tiles touching the path, ordered by how early the path passes them."""
+    left, bottom, w, h = world.viewport
+    cols = int((w * 0.75) // world.tile_size)
+    rows = int(h // world.tile_size)
+    sites: List[Tuple[int, int]] = []
+    seen = set(world.blocked)
+    for gx, gy in world.path_grid:
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = (gx + dx, gy + dy)
+                if cell in seen or not (0 <= cell[0] < cols and 0 <= cell[1] < rows):
+                    continue
+                seen.add(cell)
+                sites.append(cell)
+    return sites
+
+
+class TowerScript:
+    """Places towers on ``build_sites`` cycling through ``build`` types."""
+
+    def __init__(self, world: World, build: Sequence[str], limit: int, targeting: str = "nearest"):
+        self.world = world
+        self.build = list(build)
+        self.limit = limit
+        self.targeting = targeting
+        self._sites: Iterator[Tuple[int, int]] = iter(build_sites(world))
+        self._placed = 0
+
+    def step(self) -> None:
+        world = self.world
+        if self._placed >= self.limit or not self.build:
+            return
+        t_type = self.build[self._placed % len(self.build)]
+        if world.gold < world.tower_types[t_type]["cost"]:
+            return
+        world.build_tower_type = t_type
+        for site in self._sites:
+            if world.place_tower(site):
+                world.set_targeting(world.get_tower_at(site), self.targeting)
+                self._placed += 1
+                return
+        self.limit = self._placed  # ran out of sites
+
+
+def run_simulation(waves: int = 10, towers: int = 30, build: Sequence[str] = ("cannon",),
+                   dt: float = 1 / 60.0, array_enemies: bool = False, seed: Optional[int] = 1,
+                   max_ticks: Optional[int] = None, map_cache: Optional[MapCache] = None,
+                   viewport: Tuple[float, float, float, float] = DEFAULT_VIEWPORT,
+                   targeting: str = "nearest", profiler: Optional[Profiler] = None) -> SimReport:
+    """Run ``waves`` waves (or until game over / ``max_ticks``) and time each phase.
+
+    Phases are timed by ``profiler`` (a fresh enabled one by default), one
+    frame per tick; pass one with ``record=True`` to keep every tick.
+    """
+    if profiler is None:
+        profiler = Profiler()
+    profiler.enabled = True
+    world = World(viewport=viewport, array_enemies=array_enemies, seed=seed, map_cache=map_cache,
+                  profiler=profiler)
+    unknown = [t for t in build if t not in world.tower_types]
+    if unknown:
+        raise ValueError(f"unknown tower type(s): {', '.join(unknown)}")
+    if targeting not in TARGETING_MODES:
+        raise ValueError(f"unknown targeting mode: {targeting}")
+    script = TowerScript(world, build, towers, targeting)
+    report = SimReport(seed=world.seed)
+    clock = time.perf_counter
+
+    start = clock()
+    while world.lives > 0:
+        if world.wave_number >= waves and not world.enemies and world._enemies_to_spawn == 0:
+            break
+        if max_ticks is not None and report.ticks >= max_ticks:
+            break
+        script.step()
+        update_world(world, dt)
+        profiler.end_frame()
+        report.ticks += 1
+        if len(world.enemies) > report.peak_enemies:
+            report.peak_enemies = len(world.enemies)
+    report.wall_seconds = clock() - start
+    for name in PHASES:
+        report.phase_seconds[name] = profiler.totals.get(name, 0.0)
+
+    report.sim_seconds = report.ticks * dt
+    report.waves = world.wave_number
+    report.lives = world.lives
+    report.gold = world.gold
+    report.towers = len(world.towers)
+    return report
+
+
+def format_report(report: SimReport) -> str:
+    lines = [
+        f"seed:         {report.seed}",
+        f"ticks:        {report.ticks} ({report.sim_seconds:.1f}s simulated in {report.wall_seconds:.2f}s)",
+        f"throughput:   {report.ticks_per_second:,.0f} ticks/s ({report.realtime_factor:.1f}x realtime)",
+        f"waves:        {report.waves}  lives: {report.lives}  gold: {report.gold}",
+        f"peak:         {report.peak_enemies} enemies, {report.towers} towers",
+        "phases:",
+    ]
+    total = sum(report.phase_seconds.values()) or 1.0
+    per_tick = 1e6 / max(1, report.ticks)
+    for name, seconds in report.phase_seconds.items():
+        lines.append(f"  {name:<10} {seconds * 1e3:9.1f} ms  {seconds * per_tick:7.1f} us/tick  "
+                     f"{100 * seconds / total:5.1f}%")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the tower defense simulation headless")
+    parser.add_argument("--waves", type=int, default=10, help="stop after this many waves are cleared")
+    parser.add_argument("--towers", type=int, default=30, help="maximum number of scripted towers")
+    parser.add_argument("--build", nargs="+", default=["cannon"], help="tower types to place, cycled")
+    parser.add_argument("--targeting", choices=TARGETING_MODES, default="nearest",
+                        help="targeting mode of the scripted towers")
+    parser.add_argument("--hz", type=float, default=60.0, help="fixed simulation rate")
+    parser.add_argument("--max-ticks", type=int, default=None, help="hard cap on simulated ticks")
+    parser.add_argument("--seed", type=int, default=1, help="world seed (maze, enemy rolls)")
+    parser.add_argument("--map-cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse generated maps from an on-disk cache (default: user cache dir)")
+    parser.add_argument("--array", action="store_true", help="use the NumPy enemy store")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--profile-out", metavar="FILE", default=None,
+                        help="write per-tick phase times to FILE (.csv, or .json with percentiles)")
+    args = parser.parse_args(argv)
+
+    map_cache = MapCache(args.map_cache or None) if args.map_cache is not None else None
+    profiler = Profiler(record=args.profile_out is not None)
+    try:
+        report = run_simulation(waves=args.waves, towers=args.towers, build=args.build,
+                                dt=1.0 / args.hz, array_enemies=args.array, seed=args.seed,
+                                max_ticks=args.max_ticks, map_cache=map_cache, targeting=args.targeting,
+                                profiler=profiler)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.profile_out:
+        profiler.dump(args.profile_out)
+    if args.json:
+        json.dump(report.to_dict(), sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual usage
+    raise SystemExit(main())
@@ -12,17 +12,40 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import json
 import logging
+import os
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.client import HTTPException, IncompleteRead
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 
+from td.tools.atlas import ATLASES
+from td.util.bundle import DEFAULT_BUNDLE, AssetBundle, reset_default_bundle, write_bundle
 from td.util.resources import resource_path
 
 LOGGER = logging.getLogger(__name__)
 
 USER_AGENT = "RandomTDAssetFetcher/1.0"
+# Parallel downloads; the files are small, so latency dominates
+DEFAULT_JOBS = 6
+CHUNK_SIZE = 64 * 1024
+# Size, mtime and verified hash of every asset on disk, relative to resource_path()
+MANIFEST_PARTS: Tuple[str, ...] = ("assets", "manifest.json")
+# Asset folders packed into the memory-mapped bundle (td.util.bundle).  Sounds,
+# music, fonts and the kv-referenced UI images need real files and stay loose.
+BUNDLED_DIRS: Tuple[str, ...] = ("textures", "animations")
+# Left out of the bundle all the same: the sprites are drawn from the atlas
+# pages (td.tools.atlas) and enemy_walk.png is not drawn at all.
+UNBUNDLED: FrozenSet[Tuple[str, ...]] = frozenset(
+    [parts for _, sources in ATLASES.values() for parts in sources.values()]
+    + [("assets", "animations", "enemy_walk.png")]
+)
 
 AssetDef = Dict[str, object]
 
@@ -135,72 +158,204 @@ class AssetDownloadError(RuntimeError):
         super().__init__("\n".join(lines))
 
 
-def _download(url: str) -> bytes:
-    req = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(req) as resp:
-        return resp.read()
+class _NoResume(Exception):
+    """The server answered a Range request with a range we cannot append."""
+
+
+def _open(url: str, offset: int, timeout: float):
+    headers = {"User-Agent": USER_AGENT}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    return urlopen(Request(url, headers=headers), timeout=timeout)
+
+
+def _fetch_once(url: str, part: Path, timeout: float) -> None:
+    """Stream ``url`` into ``part``, continuing an earlier partial download."""
+    offset = part.stat().st_size if part.exists() else 0
+    try:
+        resp = _open(url, offset, timeout)
+    except HTTPError as exc:
+        if exc.code == 416 and offset:
+            # Nothing left to fetch; the checksum decides whether ``part`` is whole
+            return
+        raise
+    with resp:
+        total: Optional[int] = None
+        if resp.status == 206:
+            # Content-Range: bytes <start>-<end>/<total>
+            span, _, size = resp.headers.get("Content-Range", "").partition("/")
+            if not span.startswith(f"bytes {offset}-"):
+                raise _NoResume(f"unexpected Content-Range {resp.headers.get('Content-Range')!r}")
+            total = int(size) if size.isdigit() else None
+            mode = "ab"
+        else:
+            # Range ignored: start over
+            offset = 0
+            mode = "wb"
+            length = resp.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+        written = offset
+        with part.open(mode) as fh:
+            for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                fh.write(chunk)
+                written += len(chunk)
+    if total is not None and written != total:
+        raise IncompleteRead(b"", total - written)
+
+
+def _fetch(url: str, dest: Path, expected_hash: Optional[str], retries: int, backoff: float,
+           timeout: float) -> None:
+    """Download ``url`` to ``dest`` through ``dest.part``.
+
+    Failed attempts keep the partial file and are resumed with a Range
+    request after an exponentially growing pause; ``dest`` only appears,
+    by atomic rename, once the whole file passed its checksum.
+    """
+    part = dest.with_name(dest.name + ".part")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    attempt = 0
+    while True:
+        try:
+            _fetch_once(url, part, timeout)
+            if expected_hash and _sha256(part) != expected_hash:
+                part.unlink(missing_ok=True)  # corrupt, resuming would keep it so
+                raise ValueError("checksum mismatch")
+            os.replace(part, dest)
+            return
+        except HTTPError as exc:
+            if exc.code < 500 and exc.code not in (408, 429):
+                part.unlink(missing_ok=True)
+                raise
+            error: Exception = exc
+        except _NoResume as exc:
+            part.unlink(missing_ok=True)
+            error = exc
+        except (OSError, HTTPException, ValueError) as exc:
+            error = exc
+        attempt += 1
+        if attempt > retries:
+            raise error
+        delay = backoff * 2 ** (attempt - 1)
+        LOGGER.info("Retrying %s in %.1fs (%s)", url, delay, error)
+        time.sleep(delay)
+
+
+def _copy_atomic(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".part")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
 
 
 def _sha256(path: Path) -> str:
     h = hashlib.sha256()
     with path.open("rb") as fh:
-        for chunk in iter(lambda: fh.read(8192), b""):
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
             h.update(chunk)
     return h.hexdigest()
 
 
-def ensure_assets(force: bool = False) -> List[Path]:
+def _load_manifest(path: Path) -> Dict[str, Dict[str, object]]:
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    with tmp.open("w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _manifest_entry(path: Path, sha256: str) -> Dict[str, object]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+
+
+def ensure_assets(force: bool = False, jobs: int = DEFAULT_JOBS, retries: int = 3, backoff: float = 0.5,
+                  timeout: float = 30.0, definitions: Sequence[AssetDef] = ASSET_DEFINITIONS,
+                  base_dir: Optional[Path] = None, verify: bool = False) -> List[Path]:
     """Ensure all known assets are present on disk.
 
     Returns a list of :class:`Path` objects that were freshly downloaded.
     Optional assets are skipped if the download fails; mandatory assets
     raise :class:`AssetDownloadError` so the caller can handle the failure
     gracefully.
+
+    Up to ``jobs`` files are fetched at once, each URL only once even if
+    several assets share it.  Interrupted downloads resume from their
+    ``.part`` file on the next call.
+
+    Files whose size and mtime still match the manifest are trusted without
+    reading them; ``verify`` rehashes every file regardless.
     """
 
-    base_dir = Path(resource_path())
-    downloaded: List[Path] = []
+    base_dir = Path(resource_path()) if base_dir is None else base_dir
+    manifest_path = base_dir.joinpath(*MANIFEST_PARTS)
+    manifest = _load_manifest(manifest_path)
+    known = dict(manifest)
     failures: List[Tuple[AssetDef, Exception]] = []
-    cache: Dict[str, bytes] = {}
+    # url -> assets still to fetch from it
+    wanted: Dict[str, List[AssetDef]] = {}
 
-    for asset in ASSET_DEFINITIONS:
+    for asset in definitions:
         dest_parts: Tuple[str, ...] = asset["dest"]  # type: ignore[assignment]
         dest_path = base_dir.joinpath(*dest_parts)
         expected_hash: Optional[str] = asset.get("sha256")  # type: ignore[assignment]
-        optional = bool(asset.get("optional"))
+        key = "/".join(dest_parts)
 
         if dest_path.exists() and not force:
-            if expected_hash and _sha256(dest_path) == expected_hash:
-                continue
+            if expected_hash:
+                if not verify and manifest.get(key) == _manifest_entry(dest_path, expected_hash):
+                    continue
+                if _sha256(dest_path) == expected_hash:
+                    manifest[key] = _manifest_entry(dest_path, expected_hash)
+                    continue
             # Corrupt file -> force refresh
             dest_path.unlink(missing_ok=True)
+        manifest.pop(key, None)
+        wanted.setdefault(asset["url"], []).append(asset)  # type: ignore[arg-type]
+
+    def fetch(url: str) -> None:
+        first, *rest = wanted[url]
+        path = base_dir.joinpath(*first["dest"])  # type: ignore[misc]
+        _fetch(url, path, first.get("sha256"), retries, backoff, timeout)  # type: ignore[arg-type]
+        for asset in rest:
+            # Same URL, same bytes: copy instead of downloading again
+            _copy_atomic(path, base_dir.joinpath(*asset["dest"]))  # type: ignore[misc]
+
+    fetched: Dict[str, Optional[Exception]] = {}
+    if wanted:
+        with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="asset-fetch") as pool:
+            futures = {pool.submit(fetch, url): url for url in wanted}
+            for future in as_completed(futures):
+                fetched[futures[future]] = future.exception()
 
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-        try:
-            url: str = asset["url"]  # type: ignore[assignment]
-            data = cache.get(url)
-            if data is None:
-                data = _download(url)
-                cache[url] = data
-            dest_path.write_bytes(data)
-        except Exception as exc:  # pragma: no cover - network failures
-            if optional:
+    downloaded: List[Path] = []
+    for url, assets in wanted.items():
+        exc = fetched.get(url)
+        verified = assets[0].get("sha256")
+        for asset in assets:
+            dest_path = base_dir.joinpath(*asset["dest"])  # type: ignore[misc]
+            if exc is None:
+                downloaded.append(dest_path)
+                if verified and asset.get("sha256") == verified:
+                    manifest["/".join(asset["dest"])] = _manifest_entry(dest_path, verified)  # type: ignore[arg-type]
+            elif asset.get("optional"):
                 LOGGER.warning("Skipping optional asset %s: %s", dest_path, exc)
-                continue
-            failures.append((asset, exc))
-            continue
+            else:
+                failures.append((asset, exc))
 
-        if expected_hash and _sha256(dest_path) != expected_hash:
-            if optional:
-                LOGGER.warning("Checksum mismatch for optional asset %s", dest_path)
-                dest_path.unlink(missing_ok=True)
-                continue
-            failures.append((asset, ValueError("checksum mismatch")))
-            dest_path.unlink(missing_ok=True)
-            continue
-
-        downloaded.append(dest_path)
+    if manifest != known:
+        try:
+            _save_manifest(manifest_path, manifest)
+        except OSError as exc:  # pragma: no cover - read-only install
+            LOGGER.warning("Could not write asset manifest %s: %s", manifest_path, exc)
 
     if failures:
         raise AssetDownloadError(failures)
@@ -208,13 +363,60 @@ def ensure_assets(force: bool = False) -> List[Path]:
     return downloaded
 
 
+def _bundle_files(base_dir: Path, definitions: Sequence[AssetDef]) -> Dict[str, Tuple[str, str]]:
+    manifest = _load_manifest(base_dir.joinpath(*MANIFEST_PARTS))
+    files: Dict[str, Tuple[str, str]] = {}
+    for asset in definitions:
+        dest_parts: Tuple[str, ...] = asset["dest"]  # type: ignore[assignment]
+        if dest_parts[1] not in BUNDLED_DIRS or dest_parts in UNBUNDLED:
+            continue
+        path = base_dir.joinpath(*dest_parts)
+        if path.exists():
+            key = "/".join(dest_parts)
+            files[key] = (str(path), str(manifest.get(key, {}).get("sha256", "")))
+    return files
+
+
+def build_bundle(base_dir: Optional[Path] = None, definitions: Sequence[AssetDef] = ASSET_DEFINITIONS,
+                 force: bool = False) -> Optional[Path]:
+    """Pack the present textures into the bundle the game maps at startup.
+
+    Without ``force`` an existing bundle is kept as long as it holds the
+    same files with the same manifest hashes.  Returns the bundle path, or
+    ``None`` if there was nothing to pack.
+    """
+    base_dir = Path(resource_path()) if base_dir is None else base_dir
+    files = _bundle_files(base_dir, definitions)
+    if not files:
+        return None
+    path = base_dir.joinpath(*DEFAULT_BUNDLE)
+    if path.exists() and not force:
+        try:
+            bundle = AssetBundle(str(path))
+            current = {name: bundle.sha256(name) for name in bundle.names()}
+            bundle.close()
+        except (OSError, ValueError):
+            current = {}
+        if all(files[name][1] for name in files) and current == {k: v[1] for k, v in files.items()}:
+            return path
+    reset_default_bundle()
+    write_bundle(str(path), files)
+    LOGGER.info("Packed %d assets into %s", len(files), path)
+    return path
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Download the Kivy TD runtime assets")
     parser.add_argument("--force", action="store_true", help="re-download assets even if they already exist")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="parallel downloads")
+    parser.add_argument("--retries", type=int, default=3, help="retries per file, resuming where it stopped")
+    parser.add_argument("--verify", action="store_true",
+                        help="rehash every present file instead of trusting the manifest")
+    parser.add_argument("--bundle", action="store_true", help="repack the texture bundle even if unchanged")
     args = parser.parse_args(argv)
 
     try:
-        files = ensure_assets(force=args.force)
+        files = ensure_assets(force=args.force, jobs=args.jobs, retries=args.retries, verify=args.verify)
     except AssetDownloadError as exc:  # pragma: no cover - manual invocation
         print(exc, file=sys.stderr)
         return 1
@@ -224,7 +426,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         for path in files:
             print(f"  - {path}")
     else:
-        print("All assets already present.")
+        print("All assets present and verified." if args.verify else "All assets already present.")
+    bundle = build_bundle(force=args.bundle or args.verify)
+    if bundle is not None:
+        print(f"Bundle: {bundle}")
     return 0
 
 
@@ -0,0 +1,177 @@
+"""Pack the sprite textures into texture atlases.
+
+Towers, the elite overlay, projectiles and explosions are drawn many times
+per frame; from one atlas page they all share a single GL texture instead of
+rebinding one per sprite.  Sprites are grouped by the filtering they are
+drawn with (pixel art ``nearest``, effects ``linear``), one atlas per group,
+written in Kivy's ``.atlas`` format to ``td/assets/atlas``::
+
+    python -m td.tools.atlas [--force]
+
+Needs Pillow; without it the game keeps loading the single textures.  The
+repeating background and path textures are not packed, a region of a page
+cannot repeat.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from td.util.resources import resource_path
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+LOGGER = logging.getLogger(__name__)
+
+ATLAS_PARTS: Tuple[str, ...] = ("assets", "atlas")
+PADDING = 2
+MAX_PAGE = 2048
+
+# atlas name -> whether it is sampled linearly, and region id -> source file
+ATLASES: Dict[str, Tuple[bool, Dict[str, Tuple[str, ...]]]] = {
+    "sprites_pixel": (False, {
+        "tower_cannon": ("assets", "textures", "tower_cannon.png"),
+        "tower_slow": ("assets", "textures", "tower_slow.png"),
+        "tower_elite": ("assets", "textures", "tower_elite.png"),
+    }),
+    "sprites_smooth": (True, {
+        "projectile": ("assets", "animations", "projectile.gif"),
+        "explosion": ("assets", "animations", "explosion.gif"),
+    }),
+}
+
+
+def atlas_path(name: str, base_dir: Optional[Path] = None) -> Path:
+    base_dir = Path(resource_path()) if base_dir is None else base_dir
+    return base_dir.joinpath(*ATLAS_PARTS, f"{name}.atlas")
+
+
+def _pow2(n: int) -> int:
+    size = 64
+    while size < n:
+        size *= 2
+    return size
+
+
+def pack(sizes: Dict[str, Tuple[int, int]], padding: int = PADDING,
+         max_page: int = MAX_PAGE) -> List[Tuple[Tuple[int, int], Dict[str, Tuple[int, int]]]]:
+    """Shelf-pack ``sizes`` into pages.
+
+    Returns ``[((page_w, page_h), {id: (x, y)}), ...]`` with top-left
+    origins; each sprite keeps ``padding`` pixels to its neighbours.
+    """
+    order = sorted(sizes, key=lambda k: (-sizes[k][1], -sizes[k][0], k))
+    area = sum((w + 2 * padding) * (h + 2 * padding) for w, h in sizes.values())
+    widest = max(w for w, _ in sizes.values()) + 2 * padding
+    if widest > max_page or max(h for _, h in sizes.values()) + 2 * padding > max_page:
+        raise ValueError(f"sprite larger than the {max_page}px atlas page")
+    page_w = min(max_page, _pow2(max(widest, int((area * 1.2) ** 0.5))))
+
+    pages = []
+    spots: Dict[str, Tuple[int, int]] = {}
+    x = y = shelf = 0
+    for key in order:
+        w, h = sizes[key]
+        w += 2 * padding
+        h += 2 * padding
+        if x + w > page_w:
+            x, y, shelf = 0, y + shelf, 0
+        if y + h > max_page:
+            pages.append(((page_w, _pow2(y)), spots))
+            spots, x, y, shelf = {}, 0, 0, 0
+        spots[key] = (x + padding, y + padding)
+        x += w
+        shelf = max(shelf, h)
+    pages.append(((page_w, _pow2(y + shelf)), spots))
+    return pages
+
+
+def build_atlas(name: str, linear: bool, sources: Dict[str, Tuple[str, ...]], base_dir: Path,
+                force: bool = False) -> Optional[Path]:
+    files = {key: base_dir.joinpath(*parts) for key, parts in sources.items()}
+    files = {key: path for key, path in files.items() if path.exists()}
+    out = atlas_path(name, base_dir)
+    if not files:
+        return None
+    if not force and out.exists():
+        built = out.stat().st_mtime_ns
+        try:
+            meta = json.loads(out.read_text(encoding="utf-8"))
+            packed = {key for ids in meta.values() for key in ids}
+        except (ValueError, AttributeError):
+            packed = set()  # unreadable: rebuild it
+        if packed == set(files) and all(p.stat().st_mtime_ns <= built for p in files.values()):
+            return out
+
+    images = {key: Image.open(path).convert("RGBA") for key, path in files.items()}
+    pages = pack({key: img.size for key, img in images.items()})
+    out.parent.mkdir(parents=True, exist_ok=True)
+    meta: Dict[str, Dict[str, List[int]]] = {}
+    for i, ((page_w, page_h), spots) in enumerate(pages):
+        page = Image.new("RGBA", (page_w, page_h), (0, 0, 0, 0))
+        for key, (x, y) in spots.items():
+            img = images[key]
+            if linear:
+                # Repeat the border pixels into the padding so filtering at
+                # the edges never samples a neighbour
+                for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, 1), (-1, 1), (1, -1)):
+                    page.paste(img, (x + dx, y + dy))
+            page.paste(img, (x, y))
+            w, h = img.size
+            # Kivy counts y from the bottom of the page
+            meta.setdefault(f"{name}-{i}.png", {})[key] = [x, page_h - y - h, w, h]
+        page.save(out.parent / f"{name}-{i}.png")
+    tmp = out.with_name(out.name + ".part")
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    tmp.replace(out)
+    LOGGER.info("Packed %d sprites into %s (%d page(s))", len(images), out, len(pages))
+    return out
+
+
+def build_atlases(base_dir: Optional[Path] = None, force: bool = False) -> List[Path]:
+    """Build every atlas whose sources changed; returns the atlas files present.
+
+    An atlas that cannot be built (unreadable image, sprite larger than a
+    page) is skipped with a warning; the game then loads those sprites as
+    single textures.
+    """
+    if Image is None:
+        LOGGER.info("Pillow not installed, not building texture atlases")
+        return []
+    base_dir = Path(resource_path()) if base_dir is None else base_dir
+    built = []
+    for name, (linear, sources) in ATLASES.items():
+        try:
+            path = build_atlas(name, linear, sources, base_dir, force)
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Skipping atlas %s: %s", name, exc)
+            stale = atlas_path(name, base_dir)
+            stale.unlink(missing_ok=True)  # don't let the game load an outdated one
+            continue
+        if path is not None:
+            built.append(path)
+    return built
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pack the sprite textures into texture atlases")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the sources did not change")
+    args = parser.parse_args(argv)
+    if Image is None:
+        print("Pillow is required: pip install pillow", file=sys.stderr)
+        return 1
+    for path in build_atlases(force=args.force):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual usage
+    raise SystemExit(main())
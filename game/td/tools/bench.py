@@ -0,0 +1,393 @@
+"""Micro-benchmarks for the simulation core.
+
+Run from the ``game`` directory, e.g. ``python -m td.tools.bench targeting``.
+Every benchmark builds a plain :class:`~td.core.world.World` without Kivy,
+fills it with synthetic towers/enemies and prints a small timing table.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from td.core.enemy_store import EnemyStore, np
+from td.core.entities import Enemy, Tower
+from td.core.map_cache import MapCache
+from td.core.spatial import SpatialHash
+from td.core.targeting import TARGETING_MODES, acquire_target
+from td.core.world import World
+from td.util.geometry import vec2_dist
+
+DEFAULT_COUNTS: Sequence[int] = (100, 1_000, 10_000)
+MEMORY_COUNTS: Sequence[int] = (10_000, 100_000)
+BENCH_VIEWPORT = (0, 0, 1280, 720)
+
+
+def _best_of(fn: Callable[[], object], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _place_towers(world: World, count: int, rnd: random.Random) -> List[Tower]:
+    """Fill free tiles next to the path with towers of mixed levels."""
+    left, bottom, w, h = world.viewport
+    cols = int((w * 0.75) // world.tile_size)
+    rows = int(h // world.tile_size)
+    free = [(gx, gy) for gx in range(cols) for gy in range(rows) if (gx, gy) not in world.blocked]
+    rnd.shuffle(free)
+    world.gold = 10**9
+    for grid in free[:count]:
+        world.build_tower_type = rnd.choice(list(world.tower_types))
+        world.place_tower(grid)
+    for tower in world.towers:
+        tower.level = rnd.randint(1, 6)
+        for key, value in world.get_tower_stats(tower.tower_type, tower.level).items():
+            setattr(tower, key, value)
+        world.cover(tower)
+    return list(world.towers)
+
+
+def _scatter_enemies(world: World, count: int, rnd: random.Random) -> List[Enemy]:
+    """Drop ``count`` enemies at random points along the path."""
+    total = world.path_lengths[-1]
+    enemies = [Enemy(hp=100, speed=60, waypoints=world.path_pixels, lengths=world.path_lengths,
+                     dist=rnd.random() * total)
+               for _ in range(count)]
+    world.enemies = enemies
+    world.enemy_grid_stale = True
+    return enemies
+
+
+def populated_world(enemy_count: int, tower_count: int = 60, seed: int = 1) -> World:
+    rnd = random.Random(seed)
+    world = World(viewport=BENCH_VIEWPORT, seed=seed)
+    _place_towers(world, tower_count, rnd)
+    _scatter_enemies(world, enemy_count, rnd)
+    return world
+
+
+def _traced_bytes(build: Callable[[], object]) -> Tuple[int, object]:
+    """Bytes still allocated after ``build()``; its result is kept alive and returned."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        keep = build()
+        return tracemalloc.get_traced_memory()[0] - before, keep
+    finally:
+        tracemalloc.stop()
+
+
+def _linear_target(enemies: Sequence[Enemy], tower: Tower) -> Optional[Enemy]:
+    """The original O(enemies) nearest-in-range scan, kept as a baseline."""
+    target = None
+    best = 1e9
+    for e in enemies:
+        if not e.alive:
+            continue
+        d = vec2_dist((tower.x, tower.y), (e.x, e.y))
+        if d <= tower.rng and d < best:
+            best = d
+            target = e
+    return target
+
+
+def _hashed_target(grid: SpatialHash, tower: Tower) -> Optional[Enemy]:
+    """Nearest-in-range via a uniform grid, the previous implementation."""
+    rng_sq = tower.rng * tower.rng
+    target = None
+    best = 1e18
+    for e in grid.query(tower.x, tower.y, tower.rng):
+        if not e.alive:
+            continue
+        dx = e.x - tower.x
+        dy = e.y - tower.y
+        d = dx * dx + dy * dy
+        if d <= rng_sq and d < best:
+            best = d
+            target = e
+    return target
+
+
+def bench_targeting(counts: Sequence[int], towers: int, rounds: int) -> None:
+    print(f"targeting: {towers} towers, best of {rounds} ticks (index rebuild included)")
+    print(f"{'enemies':>8} {'linear ms':>10} {'hashed ms':>10} {'coverage ms':>12} {'vs linear':>10}")
+    for count in counts:
+        world = populated_world(count, towers)
+        enemies = world.enemies
+        grid = SpatialHash(world.tile_size)
+        index = world.enemy_index
+
+        def linear() -> None:
+            for t in world.towers:
+                _linear_target(enemies, t)
+
+        def hashed() -> None:
+            grid.rebuild(enemies)
+            for t in world.towers:
+                _hashed_target(grid, t)
+
+        def covered() -> None:
+            index.rebuild(enemies)
+            for t in world.towers:
+                acquire_target(index, t)
+
+        grid.rebuild(enemies)
+        index.rebuild(enemies)
+        for t in world.towers:
+            expected = _linear_target(enemies, t)
+            assert _hashed_target(grid, t) is expected
+            assert acquire_target(index, t) is expected
+
+        lin = _best_of(linear, rounds)
+        hsh = _best_of(hashed, rounds)
+        cov = _best_of(covered, rounds)
+        print(f"{count:>8} {lin * 1e3:>10.2f} {hsh * 1e3:>10.2f} {cov * 1e3:>12.2f} {lin / cov:>9.1f}x")
+
+
+# Baseline ranking per targeting mode: the in-range enemy with the largest key
+# wins; hp ties go to the enemy further along, like the segment tree.
+_LINEAR_KEYS = {
+    "nearest": lambda e, d: -d,
+    "first": lambda e, d: e.dist,
+    "last": lambda e, d: -e.dist,
+    "strongest": lambda e, d: (e.hp, e.dist),
+    "weakest": lambda e, d: (-e.hp, e.dist),
+}
+
+
+def _linear_pick(enemies: Sequence[Enemy], tower: Tower, key: Callable[[Enemy, float], object]) -> Optional[Enemy]:
+    rng_sq = tower.rng * tower.rng
+    target = None
+    best = None
+    for e in enemies:
+        if not e.alive:
+            continue
+        dx = e.x - tower.x
+        dy = e.y - tower.y
+        d = dx * dx + dy * dy
+        if d > rng_sq:
+            continue
+        k = key(e, d)
+        if target is None or k > best:
+            target, best = e, k
+    return target
+
+
+def bench_strategies(counts: Sequence[int], towers: int, rounds: int) -> None:
+    print(f"strategies: {towers} towers all using one mode, best of {rounds} ticks (index rebuild included)")
+    print(f"{'enemies':>8} {'mode':>10} {'linear ms':>10} {'indexed ms':>11} {'speedup':>8}")
+    for count in counts:
+        world = populated_world(count, towers)
+        rnd = random.Random(count)
+        enemies = world.enemies
+        for e in enemies:
+            e.hp = rnd.uniform(1.0, 100.0)
+        index = world.enemy_index
+        for mode in TARGETING_MODES:
+            key = _LINEAR_KEYS[mode]
+            for t in world.towers:
+                t.targeting = mode
+
+            def linear() -> None:
+                for t in world.towers:
+                    _linear_pick(enemies, t, key)
+
+            def indexed() -> None:
+                index.rebuild(enemies)
+                for t in world.towers:
+                    acquire_target(index, t)
+
+            index.rebuild(enemies)
+            for t in world.towers:
+                assert acquire_target(index, t) is _linear_pick(enemies, t, key), (mode, t.grid)
+
+            lin = _best_of(linear, rounds)
+            idx = _best_of(indexed, rounds)
+            print(f"{count:>8} {mode:>10} {lin * 1e3:>10.2f} {idx * 1e3:>11.2f} {lin / idx:>7.1f}x")
+
+
+def _linear_radius(enemies: Sequence[Enemy], x: float, y: float, r: float) -> List[Enemy]:
+    r_sq = r * r
+    return [e for e in enemies if e.alive and (e.x - x) ** 2 + (e.y - y) ** 2 <= r_sq]
+
+
+def bench_splash(counts: Sequence[int], towers: int, rounds: int) -> None:
+    """One blast per tower at its current target, as in a late wave of splash towers."""
+    print(f"splash: one blast per tower ({towers} towers), best of {rounds} ticks (grid rebuild included)")
+    print(f"{'enemies':>8} {'blasts':>7} {'hits/blast':>11} {'linear ms':>10} {'grid ms':>9} {'speedup':>8}")
+    for count in counts:
+        world = populated_world(count, towers)
+        enemies = world.enemies
+        index = world.enemy_index
+        index.rebuild(enemies)
+        radius = world.get_tower_stats("splash", 1)["splash"]
+        blasts = []
+        for t in world.towers:
+            target = acquire_target(index, t)
+            if target is not None:
+                blasts.append((target.x, target.y, radius))
+
+        def linear() -> None:
+            for x, y, r in blasts:
+                _linear_radius(enemies, x, y, r)
+
+        def gridded() -> None:
+            world.enemy_grid_stale = True
+            for x, y, r in blasts:
+                world.enemies_in_radius(x, y, r)
+
+        hits = 0
+        for x, y, r in blasts:
+            found = world.enemies_in_radius(x, y, r)
+            assert set(map(id, found)) == set(map(id, _linear_radius(enemies, x, y, r)))
+            hits += len(found)
+
+        lin = _best_of(linear, rounds)
+        grd = _best_of(gridded, rounds)
+        per_blast = hits / len(blasts) if blasts else 0.0
+        print(f"{count:>8} {len(blasts):>7} {per_blast:>11.1f} {lin * 1e3:>10.2f} {grd * 1e3:>9.2f} {lin / grd:>7.1f}x")
+
+
+def bench_movement(counts: Sequence[int], rounds: int) -> None:
+    if np is None:
+        print("movement: numpy is not installed, skipping array store")
+        return
+    dt = 1 / 60.0
+    print(f"movement: one {dt * 1e3:.1f} ms step, best of {rounds}")
+    print(f"{'enemies':>8} {'objects ms':>11} {'arrays ms':>10} {'speedup':>8}")
+    for count in counts:
+        world = populated_world(count, tower_count=0)
+        enemies = world.enemies
+        store = EnemyStore(world.path_pixels, world.path_lengths, capacity=count)
+        for e in enemies:
+            store.spawn(e.hp, e.speed, dist=e.dist)
+
+        def objects() -> None:
+            for e in enemies:
+                e.update(dt)
+
+        obj = _best_of(objects, rounds)
+        arr = _best_of(lambda: store.step(dt), rounds)
+        print(f"{count:>8} {obj * 1e3:>11.2f} {arr * 1e3:>10.2f} {obj / arr:>7.1f}x")
+
+
+def bench_restart(rounds: int) -> None:
+    print(f"restart: World.reset() latency over {rounds} seeds, median/max ms")
+    print(f"{'viewport':>12} {'generated':>16} {'map cache hit':>16}")
+
+    def resets(world: World) -> List[float]:
+        samples = []
+        for seed in range(rounds):
+            world.seed = seed
+            start = time.perf_counter()
+            world.reset()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for viewport in ((0, 0, 960, 720), (0, 0, 1440, 1080), (0, 0, 1920, 1440)):
+            generated = resets(World(viewport=viewport, seed=0))
+            cached_world = World(viewport=viewport, seed=0, map_cache=MapCache(tmp))
+            resets(cached_world)  # warm the cache
+            cached = resets(cached_world)
+            label = f"{viewport[2]}x{viewport[3]}"
+            cols = [f"{statistics.median(s) * 1e3:.2f}/{max(s) * 1e3:.2f}" for s in (generated, cached)]
+            print(f"{label:>12} {cols[0]:>16} {cols[1]:>16}")
+
+
+def bench_memory(counts: Sequence[int], towers: int) -> None:
+    dt = 1 / 60.0
+    world = World(viewport=BENCH_VIEWPORT, seed=1)
+    waypoints, lengths = world.path_pixels, world.path_lengths
+    total = lengths[-1]
+    print("memory: traced bytes per entity after one movement step (list/view overhead included)")
+    print(f"{'enemies':>8} {'objects B':>10} {'arrays B':>9}")
+    for count in counts:
+        rnd = random.Random(count)
+        dists = [rnd.random() * total for _ in range(count)]
+
+        def objects() -> List[Enemy]:
+            enemies = [Enemy(hp=100, speed=60, waypoints=waypoints, lengths=lengths, dist=d, uid=i + 1)
+                       for i, d in enumerate(dists)]
+            for e in enemies:
+                e.update(dt)
+            return enemies
+
+        obj, _ = _traced_bytes(objects)
+        arr = "-"
+        if np is not None:
+            def arrays() -> EnemyStore:
+                store = EnemyStore(waypoints, lengths, capacity=count)
+                for i, d in enumerate(dists):
+                    store.spawn(100, 60, dist=d, uid=i + 1)
+                store.step(dt)
+                return store
+
+            arr = f"{_traced_bytes(arrays)[0] / count:.0f}"
+        print(f"{count:>8} {obj / count:>10.0f} {arr:>9}")
+
+    def build_towers() -> List[Tower]:
+        return [Tower(x=i * 48.0 + 24.0, y=24.0, grid=(i, 0), **world.get_tower_stats("cannon", 1))
+                for i in range(towers)]
+
+    size, _ = _traced_bytes(build_towers)
+    print(f"towers: {size / towers:.0f} B each ({towers} towers)")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the tower defense simulation core")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    targeting = sub.add_parser("targeting", help="nearest-enemy acquisition: linear scan, spatial hash, path coverage")
+    targeting.add_argument("--counts", type=int, nargs="+", default=list(DEFAULT_COUNTS))
+    targeting.add_argument("--towers", type=int, default=60)
+    targeting.add_argument("--rounds", type=int, default=5)
+
+    strategies = sub.add_parser("strategies", help="every targeting mode: linear scan vs path index")
+    strategies.add_argument("--counts", type=int, nargs="+", default=list(DEFAULT_COUNTS))
+    strategies.add_argument("--towers", type=int, default=60)
+    strategies.add_argument("--rounds", type=int, default=5)
+
+    splash = sub.add_parser("splash", help="area damage: linear radius scan vs World.enemies_in_radius")
+    splash.add_argument("--counts", type=int, nargs="+", default=list(DEFAULT_COUNTS))
+    splash.add_argument("--towers", type=int, default=60)
+    splash.add_argument("--rounds", type=int, default=5)
+
+    movement = sub.add_parser("movement", help="enemy movement: per-object update vs NumPy store")
+    movement.add_argument("--counts", type=int, nargs="+", default=list(DEFAULT_COUNTS))
+    movement.add_argument("--rounds", type=int, default=5)
+
+    restart = sub.add_parser("restart", help="World construction/reset latency")
+    restart.add_argument("--rounds", type=int, default=20)
+
+    memory = sub.add_parser("memory", help="bytes per enemy/tower, objects vs NumPy store")
+    memory.add_argument("--counts", type=int, nargs="+", default=list(MEMORY_COUNTS))
+    memory.add_argument("--towers", type=int, default=1_000)
+
+    args = parser.parse_args(argv)
+    if args.bench == "targeting":
+        bench_targeting(args.counts, args.towers, args.rounds)
+    elif args.bench == "strategies":
+        bench_strategies(args.counts, args.towers, args.rounds)
+    elif args.bench == "splash":
+        bench_splash(args.counts, args.towers, args.rounds)
+    elif args.bench == "movement":
+        bench_movement(args.counts, args.rounds)
+    elif args.bench == "restart":
+        bench_restart(args.rounds)
+    elif args.bench == "memory":
+        bench_memory(args.counts, args.towers)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual usage
+    raise SystemExit(main())
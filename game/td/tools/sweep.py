@@ -0,0 +1,233 @@
+"""Balance sweeps: many headless games across all cores.
+
+Every combination of seed, tower build and stat variant is played by the
+:mod:`td.sim` tower script in a process pool; each finished run is written
+as one JSON line as soon as it arrives, and the runs are summed up per
+build and variant at the end::
+
+    python -m td.tools.sweep --seeds 500 --builds "cannon slow" "splash cannon" \\
+        --variants variants.json --out sweep.jsonl
+    python -m td.tools.sweep --aggregate sweep.jsonl
+
+A variants file maps a name to overrides of ``World.tower_types`` and
+``World.wave_rules``, e.g.
+``{"cheap_splash": {"tower_types": {"splash": {"cost": 70}}},
+"tough": {"waves": {"hp_per_wave": 18}}}``; the unchanged tables always
+run as variant ``base``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from td.core.systems import update_world
+from td.core.world import World
+from td.sim import DEFAULT_VIEWPORT, TowerScript
+
+BASE_VARIANT = "base"
+
+
+@dataclass
+class RunConfig:
+    seed: int
+    build: List[str]
+    variant: str = BASE_VARIANT
+    overrides: Dict[str, Dict] = field(default_factory=dict)
+    waves: int = 20
+    towers: int = 30
+    dt: float = 1 / 60.0
+    max_ticks: int = 200_000
+
+
+def variant_tables(base: World, overrides: Dict[str, Dict]) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+    """``base``'s tower types and wave rules with ``overrides`` applied, on fresh copies."""
+    tower_types = copy.deepcopy(base.tower_types)
+    for t_type, stats in overrides.get("tower_types", {}).items():
+        tower_types.setdefault(t_type, {}).update(stats)
+    wave_rules = dict(base.wave_rules)
+    wave_rules.update(overrides.get("waves", {}))
+    return tower_types, wave_rules
+
+
+def apply_overrides(world: World, overrides: Dict[str, Dict]) -> None:
+    world.tower_types, world.wave_rules = variant_tables(world, overrides)
+
+
+def run_one(cfg: RunConfig) -> Dict[str, object]:
+    """Play one game; the result is what ends up as a line of the results file."""
+    start = time.perf_counter()
+    world = World(viewport=DEFAULT_VIEWPORT, seed=cfg.seed)
+    apply_overrides(world, cfg.overrides)
+    script = TowerScript(world, cfg.build, cfg.towers)
+    start_lives = world.lives
+    gold_curve: List[int] = []  # gold when each wave starts
+    wave = world.wave_number
+    while world.lives > 0 and world.tick < cfg.max_ticks:
+        if world.wave_number >= cfg.waves and not world.enemies and world._enemies_to_spawn == 0:
+            break
+        script.step()
+        update_world(world, cfg.dt)
+        if world.wave_number != wave:
+            wave = world.wave_number
+            gold_curve.append(world.gold)
+    # A wave counts as survived once it is fully spawned and cleared with lives left
+    running = world.lives <= 0 or world.enemies or world._enemies_to_spawn
+    cleared = max(0, world.wave_number - (1 if running else 0))
+    return {
+        "seed": cfg.seed,
+        "build": " ".join(cfg.build),
+        "variant": cfg.variant,
+        "waves": cleared,
+        "leaks": start_lives - world.lives,
+        "lives": world.lives,
+        "gold": world.gold,
+        "towers": len(world.towers),
+        "ticks": world.tick,
+        "gold_curve": gold_curve,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def make_configs(seeds: Iterable[int], builds: Sequence[List[str]], variants: Dict[str, Dict],
+                 waves: int, towers: int) -> List[RunConfig]:
+    return [RunConfig(seed=seed, build=build, variant=name, overrides=overrides, waves=waves, towers=towers)
+            for name, overrides in variants.items()
+            for build in builds
+            for seed in seeds]
+
+
+def run_sweep(configs: Sequence[RunConfig], out: TextIO, workers: Optional[int] = None) -> Iterator[Dict]:
+    """Run ``configs`` on ``workers`` processes, write each result to ``out``
+    as it arrives and yield it."""
+    workers = workers or os.cpu_count() or 1
+    # Big enough chunks to keep pickling cheap, small enough to balance the load
+    chunksize = max(1, min(16, len(configs) // (workers * 8)))
+    if workers == 1:
+        results = map(run_one, configs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(run_one, configs, chunksize=chunksize)
+    try:
+        for result in results:
+            out.write(json.dumps(result, separators=(",", ":")) + "\n")
+            out.flush()
+            yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _pct(ordered: Sequence[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def aggregate(results: Iterable[Dict]) -> List[Dict[str, object]]:
+    """Summary per ``(variant, build)``: waves survived, leaks, mean gold per wave."""
+    groups: Dict[tuple, List[Dict]] = {}
+    for r in results:
+        groups.setdefault((r["variant"], r["build"]), []).append(r)
+    rows = []
+    for (variant, build), runs in sorted(groups.items()):
+        waves = sorted(r["waves"] for r in runs)
+        leaks = [r["leaks"] for r in runs]
+        curve_len = max(len(r["gold_curve"]) for r in runs)
+        gold_curve = []
+        for i in range(curve_len):
+            values = [r["gold_curve"][i] for r in runs if len(r["gold_curve"]) > i]
+            gold_curve.append(round(statistics.fmean(values), 1))
+        rows.append({
+            "variant": variant,
+            "build": build,
+            "runs": len(runs),
+            "waves_mean": statistics.fmean(waves),
+            "waves_p10": _pct(waves, 0.10),
+            "waves_p50": _pct(waves, 0.50),
+            "waves_p90": _pct(waves, 0.90),
+            "leaks_mean": statistics.fmean(leaks),
+            "game_over_rate": sum(1 for r in runs if r["lives"] <= 0) / len(runs),
+            "gold_curve": gold_curve,
+        })
+    return rows
+
+
+def format_table(rows: Sequence[Dict[str, object]]) -> str:
+    lines = [f"{'variant':<14} {'build':<22} {'runs':>5} {'waves':>6} {'p10':>4} {'p50':>4} {'p90':>4} "
+             f"{'leaks':>6} {'lost':>6}"]
+    for row in rows:
+        lines.append(f"{row['variant']:<14} {row['build']:<22} {row['runs']:>5} {row['waves_mean']:>6.2f} "
+                     f"{row['waves_p10']:>4} {row['waves_p50']:>4} {row['waves_p90']:>4} "
+                     f"{row['leaks_mean']:>6.2f} {100 * row['game_over_rate']:>5.1f}%")
+    return "\n".join(lines)
+
+
+def _load_results(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run balance sweeps of headless games on all cores")
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds per build and variant")
+    parser.add_argument("--first-seed", type=int, default=1)
+    parser.add_argument("--builds", nargs="+", default=["cannon", "cannon slow", "splash cannon"],
+                        help="tower builds, each a space separated list of types cycled by the script")
+    parser.add_argument("--variants", metavar="FILE", default=None,
+                        help="JSON file of named tower_types/waves overrides")
+    parser.add_argument("--waves", type=int, default=20, help="stop a run after this many waves")
+    parser.add_argument("--towers", type=int, default=30, help="maximum number of scripted towers")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--out", default="sweep.jsonl", help="per-run results, one JSON object per line")
+    parser.add_argument("--aggregate", metavar="FILE", default=None,
+                        help="only summarise an existing results file")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.aggregate:
+        results = _load_results(args.aggregate)
+    else:
+        variants: Dict[str, Dict] = {BASE_VARIANT: {}}
+        if args.variants:
+            with open(args.variants, "r", encoding="utf-8") as fh:
+                variants.update(json.load(fh))
+        builds = [b.split() for b in args.builds]
+        base = World(viewport=DEFAULT_VIEWPORT, seed=0)
+        unknown = set()
+        for overrides in variants.values():
+            tower_types, _ = variant_tables(base, overrides)
+            unknown.update(t for b in builds for t in b if t not in tower_types)
+        unknown = sorted(unknown)
+        if unknown:
+            parser.error(f"unknown tower type(s): {', '.join(unknown)}")
+        seeds = range(args.first_seed, args.first_seed + args.seeds)
+        configs = make_configs(seeds, builds, variants, args.waves, args.towers)
+        start = time.perf_counter()
+        results = []
+        with open(args.out, "w", encoding="utf-8") as out:
+            for i, result in enumerate(run_sweep(configs, out, args.workers), 1):
+                results.append(result)
+                if i % 50 == 0 or i == len(configs):
+                    elapsed = time.perf_counter() - start
+                    print(f"\r{i}/{len(configs)} runs, {elapsed:.0f}s", end="", file=sys.stderr, flush=True)
+        print(file=sys.stderr)
+
+    rows = aggregate(results)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(rows))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual usage
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+import json
+import mmap
+import os
+import struct
+
+from td.util.resources import resource_path
+
+# File layout: MAGIC, header (version, index length), JSON index, then the
+# files back to back, each starting at a multiple of ALIGN.  The index maps
+# a name like "assets/textures/path.png" to [offset, size, sha256].
+MAGIC = b"TDPK"
+VERSION = 1
+ALIGN = 16
+_HEADER = struct.Struct("<4sII")
+
+DEFAULT_BUNDLE = ("assets", "assets.tdpk")
+
+
+def write_bundle(path, files):
+    """Pack ``files`` ({name: (source path, sha256)}) into one bundle at ``path``.
+
+    The bundle is written next to ``path`` and renamed into place, so a
+    running game never maps a half written file.
+    """
+    names = sorted(files)
+    sizes = {name: os.path.getsize(files[name][0]) for name in names}
+    # Offsets depend on the index length, which depends on the offsets; the
+    # index is padded to a fixed width per entry to break the cycle.
+    index = {name: [0, sizes[name], files[name][1] or ""] for name in names}
+    width = len(json.dumps(index).encode("utf-8")) + 24 * len(names) + 16
+    offset = _align(_HEADER.size + width)
+    for name in names:
+        index[name][0] = offset
+        offset = _align(offset + sizes[name])
+    raw = json.dumps(index).encode("utf-8").ljust(width)
+
+    tmp = path + ".part"
+    with open(tmp, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, VERSION, width))
+        out.write(raw)
+        for name in names:
+            out.seek(index[name][0])
+            with open(files[name][0], "rb") as src:
+                while True:
+                    chunk = src.read(64 * 1024)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+    os.replace(tmp, path)
+    return index
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class AssetBundle:
+    """Read-only, memory-mapped view of a bundle.
+
+    :meth:`view` returns a ``memoryview`` straight into the mapping; nothing
+    is read from disk until a page is touched.  Views must be released
+    before :meth:`close`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, width = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a version {VERSION} asset bundle")
+            start = _HEADER.size
+            self.index = json.loads(bytes(self._map[start:start + width]).decode("utf-8"))
+        except Exception:
+            self._map.close()
+            raise
+        self._data = memoryview(self._map)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def sha256(self, name):
+        return self.index[name][2]
+
+    def view(self, name):
+        offset, size, _ = self.index[name]
+        return self._data[offset:offset + size]
+
+    def close(self):
+        self._data.release()
+        self._map.close()
+
+
+_default = None
+
+
+def default_bundle():
+    """The game's bundle, opened on first use; ``None`` if there is none."""
+    global _default
+    if _default is None:
+        path = resource_path(*DEFAULT_BUNDLE)
+        if not os.path.exists(path):
+            return None
+        try:
+            _default = AssetBundle(path)
+        except (OSError, ValueError):
+            return None
+    return _default
+
+
+def reset_default_bundle():
+    """Forget the cached bundle, e.g. after it was rebuilt on disk."""
+    global _default
+    if _default is not None:
+        try:
+            _default.close()
+        except BufferError:
+            pass  # views still alive; the mapping goes with them
+        _default = None
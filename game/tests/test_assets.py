@@ -0,0 +1,144 @@
+"""td.tools.assets against a local HTTP stand-in server."""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from td.tools import assets
+
+PAYLOAD = bytes(range(256)) * 2000  # 512000 bytes, several read chunks
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves ``files``; honours ``Range``; can cut a response off half way."""
+
+    files = {}
+    drop_first = set()  # paths whose first response stops after half the body
+    requests = []  # (path, Range header)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Range")))
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        start = 0
+        rng = self.headers.get("Range")
+        if rng:
+            start = int(rng.split("=", 1)[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.path in self.drop_first:
+            self.drop_first.discard(self.path)
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    StandIn.files = {"/a.bin": PAYLOAD, "/b.bin": PAYLOAD[::-1]}
+    StandIn.drop_first = set()
+    StandIn.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def asset(base_url, path, dest, data=None, optional=False):
+    entry = {"dest": ("assets", dest), "url": base_url + path}
+    if data is not None:
+        entry["sha256"] = hashlib.sha256(data).hexdigest()
+    if optional:
+        entry["optional"] = True
+    return entry
+
+
+def fetch(tmp_path, definitions, **kwargs):
+    kwargs.setdefault("backoff", 0.0)
+    return assets.ensure_assets(definitions=definitions, base_dir=tmp_path, **kwargs)
+
+
+def test_dropped_connection_resumes_with_range(server, tmp_path):
+    StandIn.drop_first = {"/a.bin"}
+    files = fetch(tmp_path, [asset(server, "/a.bin", "a.bin", PAYLOAD)])
+
+    assert files == [tmp_path / "assets" / "a.bin"]
+    assert files[0].read_bytes() == PAYLOAD
+    first, second = StandIn.requests
+    assert first == ("/a.bin", None)
+    assert second == ("/a.bin", f"bytes={len(PAYLOAD) // 2}-")
+
+
+def test_partial_file_survives_a_failed_run_and_is_resumed(server, tmp_path):
+    StandIn.drop_first = {"/a.bin"}
+    definitions = [asset(server, "/a.bin", "a.bin", PAYLOAD)]
+    with pytest.raises(assets.AssetDownloadError):
+        fetch(tmp_path, definitions, retries=0)
+
+    dest = tmp_path / "assets" / "a.bin"
+    part = tmp_path / "assets" / "a.bin.part"
+    # Nothing half-written under the real name, only the .part file
+    assert not dest.exists()
+    assert part.stat().st_size == len(PAYLOAD) // 2
+
+    fetch(tmp_path, definitions, retries=0)
+    assert dest.read_bytes() == PAYLOAD
+    assert not part.exists()
+    assert StandIn.requests[-1] == ("/a.bin", f"bytes={len(PAYLOAD) // 2}-")
+
+
+def test_checksum_mismatch_never_reaches_the_destination(server, tmp_path):
+    definitions = [asset(server, "/a.bin", "a.bin", b"something else")]
+    with pytest.raises(assets.AssetDownloadError):
+        fetch(tmp_path, definitions, retries=1)
+
+    assert not (tmp_path / "assets" / "a.bin").exists()
+    assert not (tmp_path / "assets" / "a.bin.part").exists()
+    assert len(StandIn.requests) == 2  # retried from scratch
+
+
+def test_shared_url_is_downloaded_once(server, tmp_path):
+    definitions = [
+        asset(server, "/b.bin", "one.bin", PAYLOAD[::-1]),
+        asset(server, "/b.bin", "two.bin", PAYLOAD[::-1]),
+        asset(server, "/a.bin", "a.bin", PAYLOAD),
+    ]
+    files = fetch(tmp_path, definitions, jobs=4)
+
+    assert sorted(p.name for p in files) == ["a.bin", "one.bin", "two.bin"]
+    assert (tmp_path / "assets" / "two.bin").read_bytes() == PAYLOAD[::-1]
+    assert [path for path, _ in StandIn.requests].count("/b.bin") == 1
+
+
+def test_optional_404_is_skipped(server, tmp_path):
+    definitions = [
+        asset(server, "/a.bin", "a.bin", PAYLOAD),
+        asset(server, "/missing.bin", "missing.bin", optional=True),
+    ]
+    files = fetch(tmp_path, definitions)
+
+    assert files == [tmp_path / "assets" / "a.bin"]
+    assert not (tmp_path / "assets" / "missing.bin").exists()
+    assert not (tmp_path / "assets" / "missing.bin.part").exists()
+
+
+def test_present_files_are_not_fetched_again(server, tmp_path):
+    definitions = [asset(server, "/a.bin", "a.bin", PAYLOAD)]
+    fetch(tmp_path, definitions)
+    assert fetch(tmp_path, definitions) == []
+    assert len(StandIn.requests) == 1